@@ -0,0 +1,114 @@
+"""
+Benchmark da janela de coalescência de broadcasts
+
+Uma sala com N jogadores abre a rodada e todos votam espalhados ao longo
+de --burst-ms (como acontece logo após o início da votação). Mede quantas
+mensagens e bytes o servidor enfileirou para os jogadores e o tempo de
+CPU do processo, com e sem janela de coalescência.
+
+Uso:
+    python bench/bench_coalescing.py --players 50 200 --windows 0 25 50
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.server import PlanningPokerServer  # noqa: E402
+from src.utils.connection import SocketConnection  # noqa: E402
+from src.utils.network import MSG_TYPES, FrameDecoder, parse_message  # noqa: E402
+
+
+class CountingSocket:
+    """Socket falso que conta quadros e bytes; o do host também decodifica"""
+
+    def __init__(self, watch=False):
+        self.frames = 0
+        self.bytes = 0
+        self.room_id = None
+        self.watch = watch
+        self.decoder = FrameDecoder()
+        self.revealed = threading.Event()
+
+    def sendall(self, data):
+        self.frames += 1
+        self.bytes += len(data)
+        if not self.watch:
+            return
+        for frame in self.decoder.feed(data):
+            message = parse_message(frame)
+            data = message['data']
+            if message['type'] == MSG_TYPES['SUCCESS'] and 'room_id' in data:
+                self.room_id = data['room_id']
+            if message['type'] == MSG_TYPES['ROOM_DELTA'] and any(
+                    e['event'] == 'votes_revealed' for e in data['events']):
+                self.revealed.set()
+
+    def shutdown(self, how):
+        pass
+
+    def close(self):
+        pass
+
+
+def run(players, window_ms, burst_ms):
+    server = PlanningPokerServer(coalesce_window=window_ms / 1000)
+    sockets = [CountingSocket(watch=True)] + [CountingSocket() for _ in range(players - 1)]
+    connections = [SocketConnection(sock) for sock in sockets]
+    msg = lambda t, d=None: {'type': MSG_TYPES[t], 'data': d or {}}  # noqa: E731
+
+    host = connections[0]
+    server.dispatch_message(host, msg('CREATE_ROOM', {'player_name': 'host'}))
+    while sockets[0].room_id is None:
+        time.sleep(0.001)
+    for i, conn in enumerate(connections[1:]):
+        server.dispatch_message(conn, msg('JOIN_ROOM', {'room_id': sockets[0].room_id, 'player_name': f'p{i}'}))
+    server.dispatch_message(host, msg('START_VOTING', {'story': 'bench'}))
+    time.sleep(0.2)
+
+    frames_before = sum(s.frames for s in sockets)
+    bytes_before = sum(s.bytes for s in sockets)
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    gap = burst_ms / 1000 / players
+    for conn in connections:
+        server.dispatch_message(conn, msg('SUBMIT_VOTE', {'vote': '5'}))
+        time.sleep(gap)
+    if not sockets[0].revealed.wait(10):
+        raise TimeoutError("a revelação não chegou ao host")
+    burst = (time.perf_counter() - wall_before) * 1000
+    time.sleep(0.1)  # Deixa as escritoras terminarem
+
+    result = {
+        'frames': sum(s.frames for s in sockets) - frames_before,
+        'bytes': sum(s.bytes for s in sockets) - bytes_before,
+        'cpu_ms': (time.process_time() - cpu_before) * 1000,
+        'burst_ms': burst,
+    }
+    server.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--windows', type=float, nargs='+', default=[0, 25, 50], help='janelas em ms')
+    parser.add_argument('--burst-ms', type=float, default=300)
+    args = parser.parse_args()
+
+    out = sys.stdout
+    sys.stdout = open(os.devnull, 'w')  # Silencia os logs dos handlers
+    print(f"{'jogadores':>9} {'janela ms':>9} {'mensagens':>10} {'KiB':>9} {'CPU ms':>8} {'rajada ms':>9}", file=out)
+    for players in args.players:
+        for window in args.windows:
+            r = run(players, window, args.burst_ms)
+            print(f"{players:>9} {window:>9.0f} {r['frames']:>10} {r['bytes'] / 1024:>9.1f} {r['cpu_ms']:>8.1f} {r['burst_ms']:>9.0f}", file=out)
+
+
+if __name__ == '__main__':
+    main()
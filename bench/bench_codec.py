@@ -0,0 +1,75 @@
+"""
+Benchmark dos codecs de mensagem (JSON x binário)
+
+Para salas de N jogadores mede bytes por quadro e o custo de codificar e
+decodificar as duas mensagens que dominam o tráfego: o snapshot
+ROOM_STATUS e o ROOM_DELTA da revelação (votos de todos). Também mostra
+os bytes de um broadcast do snapshot para a sala inteira.
+
+Uso:
+    python bench/bench_codec.py --players 5 50 200 1000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.player import Player  # noqa: E402
+from src.models.room import Room  # noqa: E402
+from src.utils.codec import BINARY, JSON, decode_message  # noqa: E402
+from src.utils.network import MSG_TYPES, encode_message  # noqa: E402
+
+
+def build_room(players):
+    """Sala com a rodada revelada e todos os votos registrados"""
+    room = Room('BENCH1', Player('host0000', 'Host'))
+    for i in range(1, players):
+        room.add_player(Player(f'{i:08x}', f'Jogador {i}'))
+    room.start_voting('Como usuário quero exportar o relatório')
+    cards = room.deck.cards
+    for i, player_id in enumerate(room.players):
+        room.submit_vote(player_id, cards[i % len(cards)])
+    room.take_events()
+    room.reveal_votes()
+    base, events = room.take_events()
+    delta = {'room_id': room.id, 'base_version': base, 'version': room.version, 'events': events}
+    return room.get_status(), delta
+
+
+def per_call_us(fn, iterations):
+    """Tempo médio de uma chamada em microssegundos"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, nargs='+', default=[5, 50, 200, 1000])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'jogadores':>9} {'mensagem':>11} {'codec':>7} {'bytes':>8} {'encode µs':>10} "
+          f"{'decode µs':>10} {'broadcast KiB':>14}")
+    for players in args.players:
+        status, delta = build_room(players)
+        iterations = max(5, args.iterations * 50 // players)
+        for label, msg_type, data in (('room_status', MSG_TYPES['ROOM_STATUS'], status),
+                                      ('reveal', MSG_TYPES['ROOM_DELTA'], delta)):
+            for codec in (JSON, BINARY):
+                frame = encode_message(msg_type, data, codec)
+                payload = memoryview(frame)[4:]
+                assert decode_message(payload)['data'] == data
+                encode = per_call_us(lambda: encode_message(msg_type, data, codec), iterations)
+                decode = per_call_us(lambda: decode_message(payload), iterations)
+                broadcast = len(frame) * players / 1024
+                print(f"{players:>9} {label:>11} {codec.name:>7} {len(frame):>8} {encode:>10.1f} "
+                      f"{decode:>10.1f} {broadcast:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de conexões simultâneas por motor do servidor
+
+Sobe o servidor em um subprocesso (motor 'threads' ou 'asyncio'), abre N
+conexões que criam uma sala cada e mede RSS e número de threads do processo.
+
+Uso:
+    python bench/bench_connections.py --connections 2000 --engine threads asyncio
+"""
+
+import argparse
+import resource
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.utils.network import MSG_TYPES, send_message  # noqa: E402
+
+
+def read_proc_status(pid):
+    """Lê VmRSS (KiB) e Threads de /proc/<pid>/status"""
+    values = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'Threads'):
+                values[key] = int(value.split()[0])
+    return values['VmRSS'], values['Threads']
+
+
+def wait_for_port(port, timeout=10.0):
+    """Espera o servidor aceitar conexões"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Servidor não respondeu na porta {port}")
+
+
+def raise_fd_limit():
+    """Sobe o limite de descritores abertos até o teto permitido"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+def run_engine(engine, connections, port):
+    """Executa o cenário para um motor e devolve as medições"""
+    server = subprocess.Popen(
+        [sys.executable, str(ROOT / 'run_server.py'), str(port), f'--engine={engine}'],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    sockets = []
+    try:
+        wait_for_port(port)
+        time.sleep(0.2)
+        base_rss, base_threads = read_proc_status(server.pid)
+
+        started = time.perf_counter()
+        for i in range(connections):
+            try:
+                sock = socket.create_connection(('127.0.0.1', port), timeout=10)
+            except OSError as e:
+                print(f"  [{engine}] falhou após {len(sockets)} conexões: {e}")
+                break
+            send_message(sock, MSG_TYPES['CREATE_ROOM'], {'player_name': f'bench-{i}'})
+            sock.recv(65536)  # Aguarda o servidor processar a criação
+            sockets.append(sock)
+        elapsed = time.perf_counter() - started
+
+        time.sleep(0.5)
+        rss, threads = read_proc_status(server.pid)
+        opened = len(sockets)
+        return {
+            'engine': engine,
+            'connections': opened,
+            'setup_s': elapsed,
+            'base_rss_mib': base_rss / 1024,
+            'rss_mib': rss / 1024,
+            'kib_per_conn': (rss - base_rss) / opened if opened else 0.0,
+            'threads': threads,
+            'base_threads': base_threads,
+        }
+    finally:
+        for sock in sockets:
+            sock.close()
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--engine', nargs='+', default=['threads', 'asyncio'])
+    parser.add_argument('--port', type=int, default=15555)
+    args = parser.parse_args()
+
+    fd_limit = raise_fd_limit()
+    if args.connections * 2 + 64 > fd_limit:
+        print(f"Aviso: limite de descritores ({fd_limit}) pode não comportar {args.connections} conexões")
+
+    print(f"{'motor':<8} {'conexões':>9} {'setup(s)':>9} {'RSS base':>9} {'RSS':>9} {'KiB/conn':>9} {'threads':>8}")
+    for offset, engine in enumerate(args.engine):
+        r = run_engine(engine, args.connections, args.port + offset)
+        print(f"{r['engine']:<8} {r['connections']:>9} {r['setup_s']:>9.2f} "
+              f"{r['base_rss_mib']:>8.1f}M {r['rss_mib']:>8.1f}M {r['kib_per_conn']:>9.1f} {r['threads']:>8}")
+
+
+if __name__ == '__main__':
+    main()
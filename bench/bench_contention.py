@@ -0,0 +1,146 @@
+"""
+Benchmark de contenção entre salas
+
+Sobe um PlanningPokerServer em processo (sem socket de escuta). Cada sala
+"lenta" tem clientes cujo envio demora --slow-ms (Wi-Fi ruim) e uma thread
+votando sem parar. Em paralelo, uma sala rápida mede a latência entre o
+voto e a chegada da resposta e dos deltas ao host.
+Também reporta a vazão somada das salas lentas.
+
+Uso:
+    python bench/bench_contention.py --rooms 8 32 128 --slow-ms 2
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.server import PlanningPokerServer  # noqa: E402
+from src.utils.connection import SocketConnection  # noqa: E402
+from src.utils.network import MSG_TYPES, FrameDecoder, parse_message  # noqa: E402
+
+
+class BenchSocket:
+    """Socket falso que decodifica o que recebe e conta as mensagens"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.decoder = FrameDecoder()
+        self.room_id = None
+        self.count = 0
+        self.cond = threading.Condition()
+
+    def sendall(self, data):
+        if self.delay:
+            time.sleep(self.delay)  # Simula um socket lento (libera a GIL, como send)
+        for frame in self.decoder.feed(data):
+            message = parse_message(frame)
+            if message['type'] == MSG_TYPES['SUCCESS'] and 'room_id' in message['data']:
+                self.room_id = message['data']['room_id']
+        with self.cond:
+            self.count += 1
+            self.cond.notify_all()
+
+    def wait_for(self, count, timeout=30.0):
+        """Espera até ter recebido `count` mensagens"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.count >= count, timeout):
+                raise TimeoutError(f"esperava {count} mensagens, recebeu {self.count}")
+
+    def shutdown(self, how):
+        pass
+
+    def close(self):
+        pass
+
+
+def open_room(server, delay):
+    """Cria uma sala com host e convidado; devolve (conexão, socket) do host"""
+    host, guest = BenchSocket(delay), BenchSocket(delay)
+    host_conn, guest_conn = SocketConnection(host), SocketConnection(guest)
+    msg = lambda t, d: {'type': MSG_TYPES[t], 'data': d}  # noqa: E731
+    server.dispatch_message(host_conn, msg('CREATE_ROOM', {'player_name': 'host'}))
+    host.wait_for(2)
+    server.dispatch_message(guest_conn, msg('JOIN_ROOM', {'room_id': host.room_id, 'player_name': 'guest'}))
+    host.wait_for(3)
+    server.dispatch_message(host_conn, msg('START_VOTING', {'story': 'bench'}))
+    host.wait_for(4)
+    return host_conn, host
+
+
+def vote(server, host, value):
+    """Vota e reabre a rodada; espera a resposta e os três deltas no host
+
+    O convidado nunca vota, então a sala não revela sozinha. A rodada é
+    reaberta a cada voto porque trocar de voto não gera delta.
+    """
+    conn, sock = host
+    expected = sock.count + 4
+    for msg_type, data in (('SUBMIT_VOTE', {'vote': value}), ('RESET_ROUND', {}),
+                           ('START_VOTING', {'story': 'bench'})):
+        server.dispatch_message(conn, {'type': MSG_TYPES[msg_type], 'data': data})
+    sock.wait_for(expected)
+
+
+def run(room_count, slow_ms, duration):
+    server = PlanningPokerServer(coalesce_window=0)
+    slow_hosts = [open_room(server, slow_ms / 1000) for _ in range(room_count)]
+    fast_host = open_room(server, 0.0)
+
+    stop = threading.Event()
+    slow_votes = [0] * room_count
+
+    def churn(index, host):
+        values = ('1', '2', '3', '5', '8')
+        while not stop.is_set():
+            vote(server, host, values[slow_votes[index] % len(values)])
+            slow_votes[index] += 1
+
+    threads = [threading.Thread(target=churn, args=(i, h), daemon=True) for i, h in enumerate(slow_hosts)]
+    for thread in threads:
+        thread.start()
+
+    samples = []
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        t0 = time.perf_counter()
+        vote(server, fast_host, '3')
+        samples.append((time.perf_counter() - t0) * 1000)
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+    server.stop()
+
+    samples.sort()
+    return {
+        'p50': statistics.median(samples),
+        'p99': samples[max(0, int(len(samples) * 0.99) - 1)],
+        'slow_votes_s': sum(slow_votes) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rooms', type=int, nargs='+', default=[8, 32, 128])
+    parser.add_argument('--slow-ms', type=float, default=2.0)
+    parser.add_argument('--duration', type=float, default=3.0)
+    args = parser.parse_args()
+
+    out = sys.stdout
+    sys.stdout = open(os.devnull, 'w')  # Silencia os logs dos handlers
+    print(f"{'salas lentas':>12} {'rápida p50 ms':>14} {'rápida p99 ms':>14} {'votos lentos/s':>15}", file=out)
+    for room_count in args.rooms:
+        r = run(room_count, args.slow_ms, args.duration)
+        print(f"{room_count:>12} {r['p50']:>14.2f} {r['p99']:>14.2f} {r['slow_votes_s']:>15.0f}", file=out)
+
+
+if __name__ == '__main__':
+    main()
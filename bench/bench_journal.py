@@ -0,0 +1,133 @@
+"""
+Benchmark do journal das salas
+
+Mede o custo que o journal acrescenta a cada voto (Room.submit_vote com e
+sem journal, no mesmo processo) e quantos fsyncs e bytes os votos geram,
+e depois o tempo de recuperação de N salas: reaplicando só o log e a
+partir de um snapshot com um trecho curto de log depois dele.
+
+Uso:
+    python bench/bench_journal.py --votes 200000 --rooms 5000 --players 8
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models.player import Player  # noqa: E402
+from src.models.registry import RoomRegistry  # noqa: E402
+from src.models.room import Room  # noqa: E402
+from src.utils import journal as journal_module  # noqa: E402
+from src.utils.journal import Journal  # noqa: E402
+
+
+def voting_room(journal=None, players=8):
+    """Sala com uma rodada aberta"""
+    room = Room('BENCH1', Player('host0000', 'Host'), journal=journal)
+    for i in range(1, players):
+        room.add_player(Player(f'{i:08x}', f'Jogador {i}'))
+    room.start_voting('Como usuário quero exportar o relatório')
+    return room
+
+
+def vote_us(room, votes):
+    """Tempo médio de um submit_vote (trocas de voto: nunca revela)"""
+    player_ids = list(room.players)
+    cards = room.deck.cards
+    start = time.perf_counter()
+    for i in range(votes):
+        room.submit_vote(player_ids[i % len(player_ids)], cards[i % len(cards)])
+    return (time.perf_counter() - start) / votes * 1e6
+
+
+def count_fsyncs(directory, votes):
+    """Votos em ritmo de servidor ocupado: fsyncs e bytes por voto"""
+    fsyncs = []
+    real_fsync = journal_module.os.fsync
+    with mock.patch.object(journal_module.os, 'fsync', lambda fd: (fsyncs.append(fd), real_fsync(fd))):
+        journal = Journal(directory)
+        room = voting_room(journal)
+        player_ids = list(room.players)
+        start = time.perf_counter()
+        for i in range(votes):
+            room.submit_vote(player_ids[i % len(player_ids)], room.deck.cards[i % 10])
+            if i % 100 == 0:
+                time.sleep(0.001)  # ~100 mil votos/s, com pausas para a thread de escrita
+        journal.close()
+        elapsed = time.perf_counter() - start
+    size = sum(path.stat().st_size for path in Path(directory).glob('journal-*.log'))
+    return len(fsyncs), size / votes, elapsed
+
+
+def populate(directory, rooms, players, rounds):
+    """Grava no journal `rooms` salas, cada uma com `rounds` rodadas completas"""
+    journal = Journal(directory)
+    registry = RoomRegistry(journal=journal)
+    for r in range(rooms):
+        room = registry.create_room(Player(f'h{r:07x}', 'Host'), object(), None)
+        for i in range(1, players):
+            room.add_player(Player(f'p{r:05x}{i:02x}', f'Jogador {i}'))
+        for n in range(rounds):
+            room.start_voting(f'História {n}')
+            for k, player_id in enumerate(room.players):
+                room.submit_vote(player_id, room.deck.cards[(k + n) % 10])
+            room.reveal_votes()
+            room.reset_round()
+    return journal, registry
+
+
+def restore_ms(directory):
+    """Tempo para reconstruir as salas a partir do diretório do journal"""
+    registry = RoomRegistry(journal=Journal(directory))
+    start = time.perf_counter()
+    count = registry.restore(lambda: None)
+    return (time.perf_counter() - start) * 1000, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--votes', type=int, default=200000)
+    parser.add_argument('--rooms', type=int, default=5000)
+    parser.add_argument('--players', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = Journal(directory)
+        plain = vote_us(voting_room(players=args.players), args.votes)
+        logged = vote_us(voting_room(journal, args.players), args.votes)
+        journal.close()
+        print(f"submit_vote sem journal: {plain:.2f} µs   com journal: {logged:.2f} µs   "
+              f"(+{logged - plain:.2f} µs por voto)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        fsyncs, per_vote, elapsed = count_fsyncs(directory, args.votes // 4)
+        print(f"{args.votes // 4} votos em {elapsed:.2f} s: {fsyncs} fsyncs, {per_vote:.1f} bytes por voto")
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal, registry = populate(directory, args.rooms, args.players, args.rounds)
+        journal.flush()
+        entries = journal.seq
+        log_only, count = restore_ms(directory)
+        print(f"recuperação só do log: {count} salas, {entries} entradas em {log_only:.0f} ms")
+
+        # Snapshot (como o servidor faz) seguido de uma rodada a mais em cada sala
+        segment = journal.rotate()
+        journal.write_snapshot({'rooms': [room.to_snapshot() for room in registry.all_rooms()]}, segment)
+        for room in registry.all_rooms():
+            room.start_voting('Depois do snapshot')
+            for player_id in room.players:
+                room.submit_vote(player_id, '8')
+        journal.close()
+        tail = journal.seq - entries
+        with_snapshot, count = restore_ms(directory)
+        print(f"recuperação com snapshot: {count} salas, {tail} entradas no log em {with_snapshot:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Microbenchmark da latência de voto em função do número de salas
+
+Monta um PlanningPokerServer (sem abrir socket) com N salas de dois
+jogadores e mede o tempo de submit_vote em uma das salas. Com o índice
+conexão -> sala do registro o custo deve ficar plano de 10 a 100k salas; a opção
+--linear restaura a varredura antiga para comparação.
+
+Uso:
+    python bench/bench_room_lookup.py --rooms 10 1000 100000
+"""
+
+import argparse
+import io
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.server import PlanningPokerServer  # noqa: E402
+from src.utils.network import MSG_TYPES  # noqa: E402
+
+
+class NullSocket:
+    """Conexão falsa: descarta tudo que o servidor envia"""
+
+    backlogged = False
+    codec = None
+
+    def sendall(self, data, coalesce=None):
+        pass
+
+    def close(self):
+        pass
+
+
+def linear_find_player_room(server, player_id):
+    """Varredura O(salas) usada antes do índice"""
+    for room in server.registry.rooms.values():
+        if player_id in room.players:
+            return room
+    return None
+
+
+def linear_lookup(server, sock):
+    """Busca da sala da conexão varrendo todas as salas"""
+    player = server.registry.clients.get(sock)
+    if not player:
+        return None, None
+    return player, linear_find_player_room(server, player.id)
+
+
+def build_server(room_count):
+    """Cria o servidor com `room_count` salas em votação"""
+    server = PlanningPokerServer(coalesce_window=0)
+    # Executa os atores na própria thread para medir só o custo do handler
+    server.spawn = lambda task: task() or True
+    sockets = []
+    with redirect_stdout(io.StringIO()):
+        for i in range(room_count):
+            host, guest = NullSocket(), NullSocket()
+            server.create_room(host, {'player_name': f'host-{i}'})
+            room_id = server.registry.client_rooms[host].id
+            server.join_room(guest, {'room_id': room_id, 'player_name': f'guest-{i}'})
+            sockets.append(host)
+    return server, sockets
+
+
+def measure(server, sock, iterations, linear):
+    """Mede a latência (µs) de um SUBMIT_VOTE"""
+    if linear:
+        # Reproduz o caminho antigo: busca pela sala a cada mensagem
+        server.registry.lookup = lambda conn: linear_lookup(server, conn)
+    with redirect_stdout(io.StringIO()):
+        server.dispatch_message(sock, {'type': MSG_TYPES['START_VOTING'], 'data': {'story': 'bench'}})
+        samples = []
+        votes = ('1', '2', '3', '5', '8')
+        for i in range(iterations):
+            message = {'type': MSG_TYPES['SUBMIT_VOTE'], 'data': {'vote': votes[i % len(votes)]}}
+            started = time.perf_counter()
+            server.dispatch_message(sock, message)
+            samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rooms', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--linear', action='store_true', help='usa a varredura linear antiga')
+    args = parser.parse_args()
+
+    mode = 'linear' if args.linear else 'índice'
+    print(f"{'salas':>8} {'p50 µs':>9} {'p99 µs':>9}  ({mode})")
+    for room_count in args.rooms:
+        server, sockets = build_server(room_count)
+        # A última sala criada é o pior caso para a varredura linear
+        samples = sorted(measure(server, sockets[-1], args.iterations, args.linear))
+        p50 = statistics.median(samples)
+        p99 = samples[int(len(samples) * 0.99) - 1]
+        print(f"{room_count:>8} {p50:>9.2f} {p99:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
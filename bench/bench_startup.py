@@ -0,0 +1,76 @@
+"""
+Benchmark da inicialização a frio do cliente
+
+Importa src.client em interpretadores novos com `python -X importtime`,
+mede o tempo acumulado do módulo (mediana das execuções) e lista os
+módulos mais caros. Falha (código de saída 1) se a mediana passar do
+orçamento ou se algum módulo que o cliente só usa depois dos prompts
+iniciais (rede, servidor de métricas) voltar a ser importado cedo.
+
+Uso:
+    python bench/bench_startup.py --runs 15 --budget-ms 50
+"""
+
+import argparse
+import compileall
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que não podem entrar no caminho de inicialização do cliente
+DEFERRED = ('http.server', 'concurrent.futures', 'socket', 'selectors')
+
+
+def import_times(module):
+    """Tempos (µs) de uma importação num interpretador novo: módulo -> (próprio, acumulado)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='src.client')
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=50.0)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    # Mede com o bytecode em cache, como no uso normal (e não a compilação)
+    compileall.compile_dir(ROOT / 'src', quiet=1)
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals = sorted(run[args.module][1] / 1000 for run in runs)
+    median = statistics.median(totals)
+    print(f"import {args.module}: mediana {median:.1f} ms   mín {totals[0]:.1f} ms   "
+          f"máx {totals[-1]:.1f} ms   ({args.runs} execuções, orçamento {args.budget_ms:.0f} ms)")
+
+    # Módulos mais caros pelo tempo próprio (mediana entre as execuções)
+    own = {name: statistics.median(run[name][0] for run in runs if name in run) / 1000 for name in runs[0]}
+    print(f"\n{'tempo próprio':>14}  módulo")
+    for name, ms in sorted(own.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{ms:11.2f} ms  {name}")
+
+    failures = []
+    early = [name for name in DEFERRED if name in runs[0]]
+    if early:
+        failures.append(f"importados na inicialização: {', '.join(early)}")
+    if median > args.budget_ms:
+        failures.append(f"mediana de {median:.1f} ms acima do orçamento de {args.budget_ms:.0f} ms")
+    if failures:
+        print()
+        for failure in failures:
+            print(f"FALHOU: {failure}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
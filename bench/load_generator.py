@@ -0,0 +1,379 @@
+"""
+Gerador de carga: milhares de jogadores votando em paralelo
+
+Abre N salas com M jogadores cada (o host mais M-1 votantes), todos falando
+o protocolo real sobre loopback, e executa rodadas roteirizadas: o host
+inicia a votação, os votantes votam espalhados para manter --rate votos/s
+no total, o host revela quando todos votaram e reseta a rodada.
+
+Mede a latência do envio do voto até a chegada da atualização da sala que
+o reflete (ROOM_DELTA ou ROOM_STATUS), a vazão e, quando o servidor é
+iniciado pelo próprio gerador (ou indicado com --pid), RSS e threads dele.
+A latência inclui a janela de coalescência do servidor. O gerador roda em
+um único event loop; acima de alguns milhares de conexões ele próprio pode
+virar o gargalo (compare com o uso de CPU do servidor).
+
+Uso:
+    python bench/load_generator.py --engine asyncio --rooms 200 --players 10 --rounds 5 --rate 2000
+    python bench/load_generator.py --connect 127.0.0.1:5555 --pid 12345 --rooms 50
+    python bench/load_generator.py --server-arg=--workers=4 --procs 4 --rooms 400
+
+Com --procs o gerador se divide em vários processos (salas e taxa
+repartidas), para não ser ele o limite ao medir o servidor com --workers.
+Joins que caem no processo errado do servidor seguem o REDIRECT.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_connections import raise_fd_limit, read_proc_status, wait_for_port  # noqa: E402
+from src.utils.codec import decode_message  # noqa: E402
+from src.utils.network import BUFFER_SIZE, MSG_TYPES, FrameDecoder, encode_message  # noqa: E402
+
+
+class Bot:
+    """Um jogador simulado: acompanha o estado da sala a partir de snapshots e deltas"""
+
+    def __init__(self, name, stats, codec):
+        self.name = name
+        self.stats = stats
+        self.codec = codec
+        self.player_id = None
+        self.room_id = None
+        self.host = None
+        self.phase = 'idle'       # 'idle', 'voting' ou 'revealed'
+        self.story = None
+        self.voted = set()
+        self.vote_sent_at = None
+        self.reader = None
+        self.writer = None
+        self._changed = asyncio.Event()
+
+    async def connect(self, host, port):
+        """Abre a conexão e negocia o codec"""
+        self.host = host
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        asyncio.get_running_loop().create_task(self._read_loop(self.reader))
+        if self.codec != 'json':
+            self.send(MSG_TYPES['HELLO'], {'codecs': [self.codec]})
+
+    def send(self, msg_type, data=None):
+        """Envia uma mensagem (as requisições vão sempre em JSON)"""
+        self.writer.write(encode_message(msg_type, data))
+        self.stats['sent'] += 1
+
+    async def wait_until(self, predicate, timeout=60):
+        """Espera o estado acompanhado satisfazer o predicado"""
+        async def wait():
+            while not predicate():
+                self._changed.clear()
+                await self._changed.wait()
+        await asyncio.wait_for(wait(), timeout)
+
+    async def _read_loop(self, reader):
+        """Lê quadros até o servidor fechar a conexão (ou um REDIRECT trocá-la)"""
+        decoder = FrameDecoder()
+        try:
+            while reader is self.reader:
+                data = await reader.read(BUFFER_SIZE)
+                if not data:
+                    break
+                self.stats['bytes'] += len(data)
+                for frame in decoder.feed(data):
+                    message = decode_message(frame)
+                    if message:
+                        self._handle(message['type'], message['data'])
+                self._changed.set()
+        except ConnectionError:
+            pass
+        if reader is self.reader:
+            self.stats['disconnected'] += 1
+
+    def _handle(self, msg_type, data):
+        """Atualiza o estado acompanhado e mede a latência do voto"""
+        self.stats['received'] += 1
+        if msg_type == MSG_TYPES['SUCCESS']:
+            self.room_id = data.get('room_id', self.room_id)
+            self.player_id = data.get('player_id', self.player_id)
+        elif msg_type == MSG_TYPES['ERROR']:
+            self.stats['errors'] += 1
+        elif msg_type == MSG_TYPES['PING']:
+            self.send(MSG_TYPES['PONG'])
+        elif msg_type == MSG_TYPES['REDIRECT']:
+            self.stats['redirects'] += 1
+            asyncio.get_running_loop().create_task(self._follow_redirect(data))
+        elif msg_type == MSG_TYPES['ROOM_STATUS']:
+            self.phase = ('revealed' if data['votes_revealed'] else
+                          'voting' if data['is_voting'] else 'idle')
+            self.story = data['current_story']
+            self.voted = {p['id'] for p in data['players'] if p['has_voted']}
+            self._vote_seen()
+        elif msg_type == MSG_TYPES['ROOM_DELTA']:
+            for event in data['events']:
+                kind = event['event']
+                if kind == 'voting_started':
+                    self.phase, self.story, self.voted = 'voting', event['story'], set()
+                elif kind == 'player_voted':
+                    self.voted.add(event['player_id'])
+                elif kind == 'votes_revealed':
+                    self.phase = 'revealed'
+                elif kind == 'round_reset':
+                    self.phase, self.story, self.voted = 'idle', '', set()
+            self._vote_seen()
+
+    def _vote_seen(self):
+        """Fecha a medição se a atualização já reflete o voto enviado"""
+        if self.vote_sent_at is not None and (self.player_id in self.voted or self.phase == 'revealed'):
+            self.stats['latencies'].append(time.perf_counter() - self.vote_sent_at)
+            self.vote_sent_at = None
+
+    async def _follow_redirect(self, data):
+        """Reconecta no processo dono da sala e repete o JOIN"""
+        old_writer = self.writer
+        await self.connect(self.host, data['port'])
+        self.send(MSG_TYPES['JOIN_ROOM'], {'room_id': data['room_id'], 'player_name': self.name})
+        old_writer.close()
+
+    def close(self):
+        """Fecha a conexão"""
+        if self.writer:
+            self.writer.close()
+
+
+class Barrier:
+    """Libera as rodadas só quando todas as salas estão montadas"""
+
+    def __init__(self, parties):
+        self.remaining = parties
+        self.reached = asyncio.Event()
+
+    async def wait(self):
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.reached.set()
+        await self.reached.wait()
+
+
+async def run_room(index, host, port, args, stats, barrier):
+    """Cria uma sala, coloca os votantes nela e executa as rodadas"""
+    host_bot = Bot(f'host-{index}', stats, args.codec)
+    voters = [Bot(f'p{index}-{i}', stats, args.codec) for i in range(args.players - 1)]
+    bots = [host_bot] + voters
+    try:
+        await host_bot.connect(host, port)
+        host_bot.send(MSG_TYPES['CREATE_ROOM'], {'player_name': host_bot.name})
+        await host_bot.wait_until(lambda: host_bot.room_id is not None)
+        for bot in voters:
+            await bot.connect(host, port)
+            bot.send(MSG_TYPES['JOIN_ROOM'], {'room_id': host_bot.room_id, 'player_name': bot.name})
+        for bot in voters:
+            await bot.wait_until(lambda: bot.player_id is not None)
+        await barrier.wait()
+
+        # Janela em que os votos de uma rodada se espalham para manter a taxa global
+        spread = args.rooms * len(voters) / args.rate if args.rate else 0
+        for round_no in range(args.rounds):
+            story = f'round-{round_no}'
+            host_bot.send(MSG_TYPES['START_VOTING'], {'story': story})
+            await asyncio.gather(*(vote(bot, story, spread) for bot in voters))
+            await host_bot.wait_until(lambda: host_bot.phase == 'voting' and host_bot.story == story
+                                      and len(host_bot.voted) >= len(voters))
+            if host_bot.phase == 'voting':
+                host_bot.send(MSG_TYPES['REVEAL_VOTES'])
+            await host_bot.wait_until(lambda: host_bot.phase == 'revealed')
+            host_bot.send(MSG_TYPES['RESET_ROUND'])
+            await host_bot.wait_until(lambda: host_bot.phase == 'idle')
+            stats['rounds'] += 1
+    except (OSError, asyncio.TimeoutError) as e:
+        stats['failures'].append(f'sala {index}: {e!r}')
+    finally:
+        for bot in bots:
+            bot.close()
+
+
+async def vote(bot, story, spread):
+    """Espera a rodada começar e vota depois de um atraso aleatório"""
+    await bot.wait_until(lambda: bot.phase == 'voting' and bot.story == story)
+    if spread:
+        await asyncio.sleep(random.uniform(0, spread))
+    bot.vote_sent_at = time.perf_counter()
+    bot.send(MSG_TYPES['SUBMIT_VOTE'], {'vote': random.choice(['1', '2', '3', '5', '8'])})
+    await bot.wait_until(lambda: bot.vote_sent_at is None)
+
+
+def process_tree(pid):
+    """O processo e seus descendentes (processos do servidor com --workers)"""
+    pids = [pid]
+    for current in pids:
+        try:
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pids += [int(child) for child in f.read().split()]
+        except OSError:
+            pass
+    return pids
+
+
+def sample_tree(pid):
+    """(RSS em KiB, threads) somados na árvore de processos do servidor"""
+    rss = threads = 0
+    for current in process_tree(pid):
+        try:
+            current_rss, current_threads = read_proc_status(current)
+        except OSError:
+            continue
+        rss += current_rss
+        threads += current_threads
+    return rss, threads
+
+
+async def sample_server(pid, samples):
+    """Coleta RSS e threads do servidor periodicamente"""
+    while True:
+        samples.append(sample_tree(pid))
+        await asyncio.sleep(0.5)
+
+
+async def run_load(host, port, pid, args):
+    """Executa o cenário completo e devolve as estatísticas"""
+    stats = {'sent': 0, 'received': 0, 'bytes': 0, 'errors': 0, 'disconnected': 0,
+             'redirects': 0, 'rounds': 0, 'latencies': [], 'failures': []}
+    samples = []
+    sampler = asyncio.create_task(sample_server(pid, samples)) if pid else None
+    barrier = Barrier(args.rooms)
+    started = time.perf_counter()
+    rooms = [asyncio.create_task(run_room(i, host, port, args, stats, barrier)) for i in range(args.rooms)]
+    await barrier.reached.wait()
+    stats['setup_s'] = time.perf_counter() - started
+    load_started = time.perf_counter()
+    received_before = stats['received']
+    await asyncio.gather(*rooms)
+    stats['load_s'] = time.perf_counter() - load_started
+    stats['load_received'] = stats['received'] - received_before
+    if sampler:
+        sampler.cancel()
+    stats['server'] = samples
+    return stats
+
+
+def run_procs(host, port, pid, args):
+    """Divide salas e taxa entre --procs geradores e junta as estatísticas"""
+    children = []
+    for i in range(args.procs):
+        rooms = args.rooms // args.procs + (1 if i < args.rooms % args.procs else 0)
+        children.append(subprocess.Popen(
+            [sys.executable, __file__, '--connect', f'{host}:{port}', '--rooms', str(rooms),
+             '--players', str(args.players), '--rounds', str(args.rounds),
+             '--rate', str(args.rate / args.procs), '--codec', args.codec, '--json'],
+            stdout=subprocess.PIPE
+        ))
+    samples = []
+    while any(child.poll() is None for child in children):
+        if pid:
+            samples.append(sample_tree(pid))
+        time.sleep(0.5)
+
+    stats = {'latencies': [], 'failures': [], 'server': samples}
+    for child in children:
+        part = json.loads(child.stdout.read())
+        for key, value in part.items():
+            if isinstance(value, list):
+                stats[key] += value
+            elif key in ('setup_s', 'load_s'):
+                stats[key] = max(stats.get(key, 0), value)
+            else:
+                stats[key] = stats.get(key, 0) + value
+    return stats
+
+
+def percentile(values, fraction):
+    """Percentil por posição em uma lista ordenada"""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def report(stats, args):
+    """Imprime o resumo da execução"""
+    latencies = sorted(stats['latencies'])
+    connections = args.rooms * args.players
+    print(f"Conexões: {connections} ({args.rooms} salas x {args.players} jogadores), "
+          f"montagem em {stats['setup_s']:.2f}s")
+    print(f"Rodadas concluídas: {stats['rounds']}/{args.rooms * args.rounds} em {stats['load_s']:.2f}s")
+    if latencies:
+        print(f"Votos: {len(latencies)} ({len(latencies) / stats['load_s']:.0f}/s) | "
+              f"latência voto -> atualização p50 {percentile(latencies, 0.50) * 1000:.1f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+              f"média {statistics.fmean(latencies) * 1000:.1f} ms")
+    print(f"Mensagens recebidas durante as rodadas: {stats['load_received']} "
+          f"({stats['load_received'] / stats['load_s']:.0f}/s), {stats['bytes'] / 1024 / 1024:.1f} MiB no total"
+          + (f" | redirecionamentos: {stats['redirects']}" if stats['redirects'] else ''))
+    if stats['server']:
+        peak_rss = max(rss for rss, _ in stats['server'])
+        peak_threads = max(threads for _, threads in stats['server'])
+        print(f"Servidor: RSS pico {peak_rss / 1024:.1f} MiB, threads pico {peak_threads}")
+    if stats['errors'] or stats['failures']:
+        print(f"Erros do servidor: {stats['errors']} | salas com falha: {len(stats['failures'])}")
+        for failure in stats['failures'][:5]:
+            print(f"  {failure}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rooms', type=int, default=100)
+    parser.add_argument('--players', type=int, default=8, help='jogadores por sala, incluindo o host')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--rate', type=float, default=1000, help='votos por segundo no total (0 = sem pausa)')
+    parser.add_argument('--codec', choices=['json', 'binary'], default='json')
+    parser.add_argument('--engine', default='threads', help='motor do servidor iniciado pelo gerador')
+    parser.add_argument('--server-arg', action='append', default=[], help='opção extra do servidor (ex.: --coalesce-ms=0)')
+    parser.add_argument('--port', type=int, default=15600)
+    parser.add_argument('--connect', help='host:porta de um servidor já rodando (não inicia um)')
+    parser.add_argument('--pid', type=int, help='PID do servidor externo, para medir RSS e threads')
+    parser.add_argument('--procs', type=int, default=1, help='processos geradores')
+    parser.add_argument('--json', action='store_true', help='imprime as estatísticas brutas em JSON')
+    args = parser.parse_args()
+
+    fd_limit = raise_fd_limit()
+    if args.rooms * args.players * 2 + 64 > fd_limit:
+        print(f"Aviso: limite de descritores ({fd_limit}) pode não comportar {args.rooms * args.players} conexões")
+
+    server = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(':')
+        port = int(port)
+        pid = args.pid
+    else:
+        host, port = '127.0.0.1', args.port
+        server = subprocess.Popen(
+            [sys.executable, str(ROOT / 'run_server.py'), str(port), f'--engine={args.engine}', *args.server_arg],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        pid = server.pid
+    try:
+        wait_for_port(port)
+        if args.procs > 1:
+            stats = run_procs(host, port, pid, args)
+        else:
+            stats = asyncio.run(run_load(host, port, pid, args))
+        if args.json:
+            stats.pop('server', None)
+            print(json.dumps(stats))
+        else:
+            report(stats, args)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
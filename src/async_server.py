@@ -0,0 +1,211 @@
+"""
+Servidor do Planning Poker baseado em asyncio
+Atende todas as conexões em um único event loop, sem uma thread por cliente
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from src.server import PlanningPokerServer, STATUS_INTERVAL, shard_port
+from src.utils import log, metrics
+from src.utils.connection import OutboundQueue
+from src.utils.network import (
+    BUFFER_SIZE, LISTEN_BACKLOG, OUTBOUND_HIGH_WATER, FrameDecoder, FrameTooLarge
+)
+from src.utils.codec import decode_message
+from src.utils.display import print_header, print_success, print_error, print_info
+
+
+class StreamConnection:
+    """Adapta um asyncio.StreamWriter à interface de conexão usada pelos handlers
+
+    Os envios vão para uma OutboundQueue; uma task por conexão a esvazia
+    respeitando o drain() do transporte, então um cliente lento acumula
+    bytes só até o limite da fila e depois é desconectado.
+    """
+
+    # Buffer do transporte acima do qual drain() passa a esperar o cliente
+    TRANSPORT_HIGH_WATER = 64 * 1024
+
+    def __init__(self, writer: asyncio.StreamWriter, high_water: int = OUTBOUND_HIGH_WATER):
+        self.writer = writer
+        self.outbound = OutboundQueue(high_water)
+        self.codec = None  # Negociado no HELLO (None = JSON)
+        self.closed = False
+        self.last_seen = time.monotonic()  # Último dado recebido (heartbeat)
+        self._wakeup = asyncio.Event()
+        writer.transport.set_write_buffer_limits(high=self.TRANSPORT_HIGH_WATER)
+        self._writer_task = asyncio.get_running_loop().create_task(self._write_loop())
+
+    @property
+    def backlogged(self) -> bool:
+        """A fila de saída está acumulando"""
+        return self.outbound.backlogged
+
+    def sendall(self, data: bytes, coalesce: Optional[str] = None):
+        """Enfileira o quadro para envio (nunca bloqueia o loop)"""
+        if self.closed:
+            return
+        if not self.outbound.put(data, coalesce):
+            # Cliente lento demais: desconecta em vez de acumular memória
+            metrics.SLOW_CLIENTS.inc()
+            self.close()
+            return
+        metrics.OUTBOUND_QUEUE_BYTES.observe(self.outbound.pending_bytes)
+        self._wakeup.set()
+
+    async def _write_loop(self):
+        """Esvazia a fila de saída"""
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                data = self.outbound.get(block=False)
+                while data is not None:
+                    self.writer.write(data)
+                    metrics.BYTES_SENT.inc(len(data))
+                    await self.writer.drain()
+                    data = self.outbound.get(block=False)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """Fecha o transporte imediatamente (idempotente)"""
+        if self.closed:
+            return
+        self.closed = True
+        self.outbound.close()
+        self._wakeup.set()
+        # abort() descarta o que o cliente lento não leu; close() esperaria por ele
+        self.writer.transport.abort()
+
+
+class AsyncPlanningPokerServer(PlanningPokerServer):
+    """Mesma semântica de salas do servidor com threads, sobre asyncio streams"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop = None
+        self._stopped = None
+
+    def start(self):
+        """Inicia o servidor"""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            print_error(f"Erro ao iniciar servidor: {e}")
+
+    async def serve(self):
+        """Abre o socket de escuta e atende clientes até stop()"""
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        sharded = self.registry.shard_count > 1
+        if self.journal:
+            self.restore_rooms()
+        # Marcado antes de abrir as portas: start_server já aceita conexões,
+        # e uma aceita antes do segundo await não pode ver running == False
+        self.running = True
+        try:
+            # Com vários processos, o kernel distribui as conexões da porta comum
+            self.server_socket = await asyncio.start_server(
+                self.handle_stream, self.host, self.port,
+                reuse_address=True, reuse_port=sharded or None, backlog=LISTEN_BACKLOG
+            )
+            if sharded:
+                self.shard_socket = await asyncio.start_server(
+                    self.handle_stream, self.host, shard_port(self.port, self.registry.shard),
+                    reuse_address=True, backlog=LISTEN_BACKLOG
+                )
+        except OSError:
+            self.running = False
+            if self.server_socket:
+                self.server_socket.close()
+            raise
+
+        if sharded:
+            print_success(f"Processo {self.registry.shard + 1}/{self.registry.shard_count} rodando em "
+                          f"{self.host}:{self.port} (asyncio, porta própria "
+                          f"{shard_port(self.port, self.registry.shard)})")
+        else:
+            print_header("PLANNING POKER - SERVIDOR")
+            print_success(f"Servidor rodando em {self.host}:{self.port} (asyncio)")
+            print_info("Pressione Ctrl+C para parar o servidor\n")
+
+        status_task = None
+        if self.metrics_port is not None:
+            self.start_metrics()
+        else:
+            status_task = asyncio.create_task(self.print_status_async())
+        if self.journal:
+            self.start_snapshots()
+        try:
+            await self._stopped.wait()
+        finally:
+            if status_task:
+                status_task.cancel()
+            if self.running:
+                self.stop()
+
+    def spawn(self, task) -> bool:
+        """Os atores das salas rodam no próprio event loop (False se recusada)"""
+        if self.stopping:
+            return False
+        try:
+            self.loop.call_soon_threadsafe(task)
+        except RuntimeError:  # Loop já fechado no encerramento
+            if not self.stopping:
+                raise
+            return False
+        return True
+
+    def call_later(self, delay: float, callback, *args):
+        """Timers também ficam no event loop"""
+        return self.loop.call_later(delay, callback, *args)
+
+    async def handle_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Gerencia a comunicação com um cliente específico"""
+        connection = StreamConnection(writer, self.outbound_high_water)
+        self.open_connections.add(connection)
+        address = writer.get_extra_info('peername')
+        log.info('connection_opened', address=f"{address[0]}:{address[1]}")
+        self.watch_connection(connection)
+        decoder = FrameDecoder()
+        try:
+            while self.running:
+                data = await reader.read(BUFFER_SIZE)
+                if not data:
+                    break
+                connection.last_seen = time.monotonic()
+
+                for frame in decoder.feed(data):
+                    message = decode_message(frame)
+                    if message:
+                        self.dispatch_message(connection, message)
+
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except FrameTooLarge as e:
+            log.warning('frame_too_large', address=f"{address[0]}:{address[1]}", error=str(e))
+        except Exception as e:
+            log.error('connection_error', exc_info=e, address=f"{address[0]}:{address[1]}")
+        finally:
+            self.open_connections.discard(connection)
+            self.disconnect_client(connection)
+            connection.close()
+
+    async def print_status_async(self):
+        """Imprime status do servidor periodicamente"""
+        while self.running:
+            await asyncio.sleep(STATUS_INTERVAL)
+            self.report_status()
+
+    def stop(self):
+        """Para o servidor"""
+        if self._stopped is not None and self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self._stopped.set)
+        super().stop()
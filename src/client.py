@@ -3,77 +3,167 @@ Cliente do Planning Poker com suporte a múltiplos idiomas
 Interface de terminal para jogadores
 """
 
-import socket
+import itertools
 import threading
-import json
 import time
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, Optional
 
+from src.models.deck import DECKS, DEFAULT_DECK, get_deck
+from src.models.room import Room
 from src.utils.network import (
     DEFAULT_PORT, BUFFER_SIZE,
-    MSG_TYPES, parse_message, send_message
+    MSG_TYPES, FrameDecoder, send_message
 )
+from src.utils.codec import CODECS, JSON, decode_message
 from src.utils.display import (
     clear_screen, print_header, print_success, print_error, 
     print_info, print_cards, print_room_status, get_input,
-    print_menu, print_votes_summary, Fore, Style
+    print_menu, print_votes_summary, screen, Fore, Style
 )
 from src.utils.i18n import t, set_language, save_language_preference, load_language_preference
 
+if TYPE_CHECKING:
+    # Só para as anotações: em tempo de execução são importados ao conectar
+    import socket
+    from concurrent.futures import Future
+
+# Esperas (segundos) entre as tentativas de reconexão após uma queda
+RECONNECT_DELAYS = (0.5, 1, 2, 4, 8)
+
+# Espera máxima (segundos) pela resposta de uma requisição
+REQUEST_TIMEOUT = 5.0
+
+# Quadros por segundo, no máximo, da tela ao vivo da sala
+MAX_FPS = 10
+
 
 class PlanningPokerClient:
-    def __init__(self):
+    def __init__(self, request_timeout: float = REQUEST_TIMEOUT):
         self.socket = None
+        self.host = None
+        self.port = None
         self.connected = False
         self.room_id = None
         self.player_id = None
         self.player_name = None
         self.room_status = None
+        self.resume_token = None  # Entregue pelo servidor no SUCCESS; retoma o lugar após uma queda
+        self.codec = JSON  # Codec das mensagens recebidas (definido pelo servidor no HELLO)
+        self.snapshot_requested = False
         self.is_host = False
         self.running = True
         self.receive_thread = None
+        # Requisições aguardando resposta, por id (resolvidas pela thread de recepção)
+        self.request_timeout = request_timeout
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, 'Future'] = {}
+        self._status_changed = threading.Condition()
+        # Envios ao socket: a thread de recepção também escreve (PONG, RESUME, GET_ROOM_STATUS)
+        self._send_lock = threading.Lock()
+        self.live = None  # Entrada do modo ao vivo (criada ao entrar na sala, se o terminal permitir)
         
     def connect(self, host: str, port: int) -> bool:
         """Conecta ao servidor"""
+        # Importado só ao conectar: os prompts iniciais não precisam de rede
+        import socket
         try:
+            self.host = host
+            self.port = port
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.connect((host, port))
             self.connected = True
             
             # Inicia thread para receber mensagens
-            self.receive_thread = threading.Thread(target=self.receive_messages)
+            self.receive_thread = threading.Thread(target=self.receive_messages, args=(self.socket,))
             self.receive_thread.daemon = True
             self.receive_thread.start()
             
+            # Oferece o codec binário; servidores antigos ignoram e seguem em JSON
+            self.send(MSG_TYPES['HELLO'], {'codecs': list(CODECS)})
+            
             return True
         except Exception as e:
             print_error(t('connection_failed') + f": {e}")
             return False
     
-    def receive_messages(self):
+    def send(self, msg_type: str, data: dict = None, request_id=None):
+        """Envia uma mensagem ao servidor, um quadro inteiro por vez entre as threads"""
+        with self._send_lock:
+            send_message(self.socket, msg_type, data, request_id)
+    
+    def receive_messages(self, sock: 'socket.socket'):
         """Recebe mensagens do servidor em background"""
-        while self.connected and self.running:
+        decoder = FrameDecoder()
+        # Termina também quando um redirecionamento troca o socket
+        while self.connected and self.running and sock is self.socket:
             try:
-                data = self.socket.recv(BUFFER_SIZE).decode('utf-8')
+                data = sock.recv(BUFFER_SIZE)
                 if not data:
                     break
                 
-                message = parse_message(data)
-                if not message:
-                    continue
-                
-                self.handle_server_message(message)
+                for frame in decoder.feed(data):
+                    message = decode_message(frame)
+                    if message:
+                        self.handle_server_message(message)
                 
             except Exception as e:
-                if self.connected:
+                if self.connected and sock is self.socket:
                     print_error(t('connection_lost') + f": {e}")
-                    self.connected = False
                 break
+        
+        if self.connected and self.running and sock is self.socket:
+            if self.resume_token:
+                self.resume_session()
+            else:
+                self.connected = False
+                self.wake()
+    
+    def resume_session(self):
+        """Reconecta após uma queda e pede de volta o lugar na sala"""
+        print_info(t('reconnecting'))
+        self.socket.close()
+        for delay in RECONNECT_DELAYS:
+            time.sleep(delay)
+            if not self.running:
+                return
+            if self.connect(self.host, self.port):
+                version = self.room_status.get('version', 0) if self.room_status else 0
+                self.send(MSG_TYPES['RESUME'], {
+                    'token': self.resume_token,
+                    'version': version
+                })
+                return
+        self.connected = False
+        self.wake()
+    
+    def request(self, msg_type: str, data: dict = None, timeout: float = None) -> Optional[dict]:
+        """Envia uma requisição e espera a resposta com o mesmo id (None se não vier)"""
+        from concurrent.futures import Future, TimeoutError as FutureTimeout
+        request_id = next(self._request_ids)
+        future = self._pending[request_id] = Future()
+        try:
+            self.send(msg_type, data, request_id)
+            return future.result(self.request_timeout if timeout is None else timeout)
+        except (FutureTimeout, OSError):
+            return None
+        finally:
+            self._pending.pop(request_id, None)
+    
+    def wait_for_version(self, version: Optional[int], timeout: float = None) -> bool:
+        """Espera o status em cache chegar à versão confirmada pelo servidor"""
+        if version is None:
+            return True
+        with self._status_changed:
+            return self._status_changed.wait_for(
+                lambda: self.room_status is not None and self.room_status.get('version', 0) >= version,
+                self.request_timeout if timeout is None else timeout)
     
     def handle_server_message(self, message: dict):
         """Processa mensagem recebida do servidor"""
         msg_type = message.get('type')
         msg_data = message.get('data', {})
+        # Resposta a uma requisição em andamento: quem pediu trata o resultado
+        future = self._pending.get(message.get('id'))
         
         if msg_type == MSG_TYPES['SUCCESS']:
             # Atualiza IDs se fornecidos
@@ -83,22 +173,103 @@ class PlanningPokerClient:
             if 'player_id' in msg_data:
                 self.player_id = msg_data['player_id']
                 print(f"[DEBUG] Player ID set to: {self.player_id}")  # Debug
+            if 'resume_token' in msg_data:
+                self.resume_token = msg_data['resume_token']
             
             # Traduz mensagens do servidor se necessário
-            msg_text = msg_data.get('message', t('operation_success'))
-            print_success(msg_text)
+            if future is None:
+                msg_text = msg_data.get('message', t('operation_success'))
+                print_success(msg_text)
             
         elif msg_type == MSG_TYPES['ERROR']:
-            msg_text = msg_data.get('message', t('error'))
-            print_error(msg_text)
+            if future is None:
+                msg_text = msg_data.get('message', t('error'))
+                print_error(msg_text)
+            if msg_data.get('resume_failed'):
+                # O lugar expirou: volta ao menu principal
+                self.room_id = None
+                self.room_status = None
+                self.resume_token = None
+                self.wake()
             
         elif msg_type == MSG_TYPES['ROOM_STATUS']:
-            self.room_status = msg_data
+            self.set_room_status(msg_data)
+            
+        elif msg_type == MSG_TYPES['ROOM_DELTA']:
+            self.apply_room_delta(msg_data)
+            
+        elif msg_type == MSG_TYPES['HELLO']:
+            self.codec = CODECS.get(msg_data.get('codec'), JSON)
+            
+        elif msg_type == MSG_TYPES['REDIRECT']:
+            # A requisição continua pendente: o JOIN repetido leva o mesmo id
+            self.follow_redirect(msg_data, message.get('id'))
+            return
+            
+        elif msg_type == MSG_TYPES['PING']:
+            self.send(MSG_TYPES['PONG'])
+        
+        if future is not None and msg_type in (MSG_TYPES['SUCCESS'], MSG_TYPES['ERROR']):
+            future.set_result(message)
+    
+    def follow_redirect(self, data: dict, request_id=None):
+        """A sala pertence a outro processo do servidor: reconecta nele e repete o JOIN"""
+        old_socket = self.socket
+        if not self.connect(self.host, data['port']):
+            self.connected = False
+            return
+        if self.resume_token and data['room_id'] == self.room_id:
+            version = self.room_status.get('version', 0) if self.room_status else 0
+            self.send(MSG_TYPES['RESUME'], {
+                'token': self.resume_token,
+                'version': version
+            }, request_id)
+        else:
+            self.send(MSG_TYPES['JOIN_ROOM'], {
+                'room_id': data['room_id'],
+                'player_name': self.player_name
+            }, request_id)
+        old_socket.close()
+    
+    def set_room_status(self, status: dict):
+        """Substitui o status da sala em cache"""
+        with self._status_changed:
+            self.room_status = status
+            self.snapshot_requested = False
             # Verifica se somos o host
-            if self.player_id and msg_data.get('host_id') == self.player_id:
+            if self.player_id and status.get('host_id') == self.player_id:
                 self.is_host = True
             else:
                 self.is_host = False
+            self._status_changed.notify_all()
+        self.wake()
+    
+    def wake(self):
+        """Avisa a tela ao vivo que o estado mudou"""
+        if self.live:
+            self.live.notify()
+    
+    def deck(self):
+        """Baralho da sala atual"""
+        return get_deck(self.room_status.get('deck') if self.room_status else None)
+    
+    def apply_room_delta(self, delta: dict):
+        """Aplica um delta ao status em cache; pede snapshot se faltar versão"""
+        status = self.room_status
+        if status is None or delta.get('room_id') != status.get('room_id'):
+            return
+        if delta['version'] <= status.get('version', 0):
+            return  # Já coberto por um snapshot mais novo
+        if delta['base_version'] != status.get('version', 0):
+            # Lacuna de versão: descarta deltas até chegar o snapshot pedido
+            if not self.snapshot_requested:
+                self.snapshot_requested = True
+                self.send(MSG_TYPES['GET_ROOM_STATUS'], {})
+            return
+        
+        status = Room.apply_events(status, delta['events'])
+        status['version'] = delta['version']
+        self.set_room_status(status)
     
     def create_room(self):
         """Cria uma nova sala"""
@@ -109,20 +280,28 @@ class PlanningPokerClient:
         if not self.player_name:
             self.player_name = "Player"
         
-        send_message(self.socket, MSG_TYPES['CREATE_ROOM'], {
-            'player_name': self.player_name
-        })
+        # Baralho da sala (Enter = o padrão)
+        decks = list(DECKS)
+        print()
+        for i, name in enumerate(decks, 1):
+            print(f"  {Fore.CYAN}{Style.BRIGHT}{i}.{Style.RESET_ALL} {t('deck_' + name)}  "
+                  f"{Style.DIM}{' '.join(DECKS[name].cards)}{Style.RESET_ALL}")
+        choice = get_input(t('deck_prompt', default=decks.index(DEFAULT_DECK) + 1))
+        deck = decks[int(choice) - 1] if choice.isdigit() and 0 < int(choice) <= len(decks) else DEFAULT_DECK
         
-        # Aguarda resposta do servidor
-        time.sleep(1)  # Aumentado de 0.5 para 1 segundo
+        reply = self.request(MSG_TYPES['CREATE_ROOM'], {
+            'player_name': self.player_name,
+            'deck': deck
+        })
         
-        if self.room_id:
+        if reply and reply['type'] == MSG_TYPES['SUCCESS']:
             print_success(t('room_created', room_id=self.room_id))
             print_info(t('share_code'))
             input(f"\n{t('press_enter')}")
             return True
         else:
-            print_error(t('error_creating_room', error='No response from server'))
+            error = reply['data'].get('message') if reply else 'No response from server'
+            print_error(t('error_creating_room', error=error))
             input(f"\n{t('press_enter')}")
             return False
     
@@ -139,41 +318,86 @@ class PlanningPokerClient:
         if not self.player_name:
             self.player_name = "Player"
         
-        send_message(self.socket, MSG_TYPES['JOIN_ROOM'], {
+        reply = self.request(MSG_TYPES['JOIN_ROOM'], {
             'room_id': room_code,
             'player_name': self.player_name
         })
         
-        # Aguarda resposta do servidor
-        time.sleep(1)  # Aumentado de 0.5 para 1 segundo
-        
-        if self.room_id:
+        if reply and reply['type'] == MSG_TYPES['SUCCESS']:
             print_success(t('joined_room', room_id=self.room_id))
             input(f"\n{t('press_enter')}")
             return True
+        elif reply:
+            print_error(reply['data'].get('message', t('room_not_found', room_id=room_code)))
+            input(f"\n{t('press_enter')}")
+            return False
         else:
-            print_error(t('room_not_found', room_id=room_code))
+            print_error(t('no_response'))
             input(f"\n{t('press_enter')}")
             return False
     
     def room_menu(self):
         """Menu principal da sala"""
+        from src.utils.live import LiveInput
+        if self.live is None and LiveInput.supported():
+            self.live = LiveInput()
+        if self.live:
+            self.live_room_menu()
+            return
+        
         while self.connected and self.room_id:
-            clear_screen()
+            self.draw_room(t('refresh_hint'))
+            
+            # Mudança aqui - sem prompt inline para evitar corte
+            print()
+            choice = input(f"{Fore.CYAN}{Style.BRIGHT}▶ {Style.RESET_ALL}").strip()
+            if not self.handle_room_choice(choice):
+                break
             
+            # Pequena pausa para processar mensagens
+            time.sleep(0.1)
+    
+    def live_room_menu(self):
+        """Sala ao vivo: redesenha a cada ROOM_STATUS e lê a opção tecla a tecla"""
+        drawn = stale = object()
+        last_frame = 0.0
+        with self.live.keys():
+            while self.connected and self.room_id:
+                timeout = None
+                if self.room_status is not drawn:
+                    # Rajadas de atualizações viram um único quadro a cada 1/MAX_FPS
+                    delay = last_frame + 1 / MAX_FPS - time.monotonic()
+                    if delay <= 0:
+                        drawn = self.room_status
+                        self.draw_room(t('live_hint'))
+                        last_frame = time.monotonic()
+                    else:
+                        timeout = delay
+                
+                key = self.live.wait(timeout)
+                if key is None:
+                    continue
+                with self.live.line_mode():
+                    if not self.handle_room_choice(key.strip()):
+                        break
+                drawn = stale  # Redesenha mesmo sem mudança: o prompt da ação sujou a tela
+                screen.invalidate()
+    
+    def draw_room(self, hint: str):
+        """Desenha o status da sala e as opções disponíveis"""
+        with screen.frame():
             # Mostra status da sala
             if self.room_status:
                 print_room_status(self.room_status)
-                
-                # Se há votos revelados, mostra resumo
-                if self.room_status.get('votes_revealed'):
-                    votes = [p['vote'] for p in self.room_status['players'] if p['vote']]
-                    print_votes_summary(votes)
             
+                # Se há votos revelados, mostra o resumo calculado pelo servidor
+                if self.room_status.get('votes_revealed'):
+                    print_votes_summary(self.room_status.get('summary'), self.deck())
+        
             # Opções do menu baseadas no estado e permissões
             print("\n" + "="*50)
             options = []
-            
+        
             if self.room_status:
                 if not self.room_status.get('is_voting'):
                     if self.is_host:
@@ -185,33 +409,40 @@ class PlanningPokerClient:
                 else:
                     if self.is_host:
                         options.append(f"4. {t('new_round')}")
-            
+                
+                # Fila de histórias (host)
+                if self.is_host:
+                    options.append(f"5. {t('load_backlog')}")
+                    if self.room_status.get('backlog'):
+                        options.append(f"6. {t('next_story', count=self.room_status['backlog'])}")
+        
             options.append(f"9. {t('leave_room')}")
             options.append("")  # Linha em branco
-            options.append(t('refresh_hint'))
-            
+            options.append(hint)
+        
             for option in options:
                 print(option)
-            
-            # Mudança aqui - sem prompt inline para evitar corte
-            print()
-            choice = input(f"{Fore.CYAN}{Style.BRIGHT}▶ {Style.RESET_ALL}").strip()
-            
-            if choice == '1' and self.is_host and not self.room_status.get('is_voting'):
-                self.start_voting()
-            elif choice == '2' and self.room_status.get('is_voting') and not self.room_status.get('votes_revealed'):
-                self.submit_vote()
-            elif choice == '3' and self.is_host and self.room_status.get('is_voting'):
-                self.reveal_votes()
-            elif choice == '4' and self.is_host and self.room_status.get('votes_revealed'):
-                self.reset_round()
-            elif choice == '9':
-                if self.confirm_exit():
-                    self.leave_room()
-                    break
-            
-            # Pequena pausa para processar mensagens
-            time.sleep(0.1)
+    
+    def handle_room_choice(self, choice: str) -> bool:
+        """Executa a opção escolhida na sala; False se o jogador saiu"""
+        status = self.room_status or {}
+        if choice == '1' and self.is_host and not status.get('is_voting'):
+            self.start_voting()
+        elif choice == '2' and status.get('is_voting') and not status.get('votes_revealed'):
+            self.submit_vote()
+        elif choice == '3' and self.is_host and status.get('is_voting'):
+            self.reveal_votes()
+        elif choice == '4' and self.is_host and status.get('votes_revealed'):
+            self.reset_round()
+        elif choice == '5' and self.is_host:
+            self.load_backlog()
+        elif choice == '6' and self.is_host and status.get('backlog'):
+            self.next_story()
+        elif choice == '9':
+            if self.confirm_exit():
+                self.leave_room()
+                return False
+        return True
     
     def start_voting(self):
         """Inicia uma votação"""
@@ -220,11 +451,9 @@ class PlanningPokerClient:
         
         story = get_input(t('story_prompt'))
         
-        send_message(self.socket, MSG_TYPES['START_VOTING'], {
+        self.room_action(MSG_TYPES['START_VOTING'], {
             'story': story
         })
-        
-        time.sleep(0.5)
     
     def submit_vote(self):
         """Submete um voto"""
@@ -234,43 +463,88 @@ class PlanningPokerClient:
         if self.room_status and self.room_status.get('current_story'):
             print(f"{t('story')}: {self.room_status['current_story']}\n")
         
-        print_cards()
-        
-        vote = get_input(f"\n{t('your_vote')}")
+        deck = self.deck()
+        print_cards(deck)
         
-        # Valida voto
-        valid_cards = ['0', '1', '2', '3', '5', '8', '13', '21', '?', '☕']
-        if vote not in valid_cards:
-            # Tenta mapear entrada alternativa
-            if vote.lower() in ['c', 'cafe', 'coffee']:
-                vote = '☕'
-            elif vote == '??':
-                vote = '?'
-            else:
-                print_error(t('invalid_vote'))
-                input(f"\n{t('press_enter')}")
-                return
+        # Valida voto (aceita também as entradas alternativas do baralho)
+        vote = deck.parse(get_input(f"\n{t('your_vote')}"))
+        if vote is None:
+            print_error(t('invalid_vote'))
+            input(f"\n{t('press_enter')}")
+            return
         
-        send_message(self.socket, MSG_TYPES['SUBMIT_VOTE'], {
+        if self.room_action(MSG_TYPES['SUBMIT_VOTE'], {
             'vote': vote
-        })
-        
-        time.sleep(0.5)
-        print_success(t('vote_registered'))
-        input(f"\n{t('press_enter')}")
+        }):
+            print_success(t('vote_registered'))
+            input(f"\n{t('press_enter')}")
     
     def reveal_votes(self):
         """Revela os votos"""
-        send_message(self.socket, MSG_TYPES['REVEAL_VOTES'], {})
-        time.sleep(0.5)
+        self.room_action(MSG_TYPES['REVEAL_VOTES'])
     
     def reset_round(self):
         """Inicia nova rodada"""
-        send_message(self.socket, MSG_TYPES['RESET_ROUND'], {})
-        time.sleep(0.5)
+        self.room_action(MSG_TYPES['RESET_ROUND'])
+    
+    def load_backlog(self):
+        """Lê um arquivo de histórias (CSV/JSON) e o envia ao servidor em pedaços"""
+        from src.utils.backlog import chunks, read_backlog
+        
+        clear_screen()
+        print_header(t('load_backlog'))
+        
+        path = get_input(t('backlog_file'))
+        if not path:
+            return
+        try:
+            stories = read_backlog(path)
+        except (OSError, ValueError) as e:
+            print_error(t('backlog_read_error', error=e))
+            input(f"\n{t('press_enter')}")
+            return
+        if not stories:
+            print_error(t('backlog_empty_file'))
+            input(f"\n{t('press_enter')}")
+            return
+        
+        # O primeiro pedaço substitui a fila anterior; os demais se somam a ela
+        for i, chunk in enumerate(chunks(stories)):
+            reply = self.request(MSG_TYPES['LOAD_BACKLOG'], {
+                'stories': chunk,
+                'replace': i == 0
+            })
+            if reply is None or reply['type'] == MSG_TYPES['ERROR']:
+                print_error(reply['data'].get('message', t('error')) if reply else t('no_response'))
+                input(f"\n{t('press_enter')}")
+                return
+        
+        self.wait_for_version(reply['data'].get('version'))
+        print_success(t('backlog_loaded', count=reply['data'].get('backlog', len(stories))))
+        input(f"\n{t('press_enter')}")
+    
+    def next_story(self):
+        """Encerra a rodada e abre a votação da próxima história da fila"""
+        self.room_action(MSG_TYPES['NEXT_STORY'])
+    
+    def room_action(self, msg_type: str, data: dict = None) -> bool:
+        """Envia uma ação de sala e espera a confirmação e o estado que a inclui"""
+        reply = self.request(msg_type, data)
+        if reply is None:
+            print_error(t('no_response'))
+        elif reply['type'] == MSG_TYPES['ERROR']:
+            print_error(reply['data'].get('message', t('error')))
+        else:
+            # O delta com a própria ação pode sair depois (janela de coalescência)
+            self.wait_for_version(reply['data'].get('version'))
+            return True
+        input(f"\n{t('press_enter')}")
+        return False
     
     def leave_room(self):
         """Sai da sala atual"""
+        self.request(MSG_TYPES['LEAVE_ROOM'])
+        self.resume_token = None
         self.room_id = None
         self.room_status = None
         self.is_host = False
@@ -353,6 +627,8 @@ class PlanningPokerClient:
         self.running = False
         if self.socket:
             self.socket.close()
+        if self.live:
+            self.live.close()
 
 
 def choose_language():
@@ -0,0 +1,71 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+# Cartas especiais, aceitas em qualquer baralho e sempre no fim
+SPECIAL_CARDS = ('?', '☕')
+
+# Entradas alternativas aceitas do teclado (além da própria carta, sem caixa)
+ALIASES = {
+    'c': '☕', 'cafe': '☕', 'café': '☕', 'coffee': '☕',
+    '??': '?',
+}
+
+
+class Deck:
+    """Baralho de votação
+
+    Tudo o que depende das cartas é calculado uma vez na criação: o conjunto
+    de validação, a ordem, o valor numérico, a posição na escala (para medir
+    consenso) e a faixa de cor de cada carta. Validar ou classificar um voto
+    é uma busca em dicionário.
+    """
+
+    def __init__(self, name: str, cards: Iterable[str], values: Optional[Dict[str, float]] = None,
+                 bands: Optional[Tuple[int, int]] = None, aliases: Optional[Dict[str, str]] = None):
+        ranked = tuple(cards)
+        self.name = name
+        self.cards = ranked + SPECIAL_CARDS
+        self.valid = frozenset(self.cards)
+        self.order = {card: i for i, card in enumerate(self.cards)}
+        # Valor para média e amplitude (baralhos sem números, como camisetas, não têm)
+        self.values = values if values is not None else {
+            card: int(card) for card in ranked if card.isdigit()
+        }
+        # Posição na escala: a distância entre o menor e o maior voto mede o consenso
+        self.ranks = {card: i for i, card in enumerate(ranked)}
+        # Faixas de cor: as `low` primeiras cartas, as `mid` seguintes e o resto
+        low, mid = bands if bands is not None else (len(ranked) // 3, len(ranked) // 3)
+        self.bands = {card: 'low' if i < low else 'mid' if i < low + mid else 'high'
+                      for i, card in enumerate(ranked)}
+        self.bands.update({card: card for card in SPECIAL_CARDS})
+        # Entrada do teclado -> carta
+        self.lookup = {card.lower(): card for card in self.cards}
+        for alias, card in {**ALIASES, **(aliases or {})}.items():
+            if card in self.valid:
+                self.lookup.setdefault(alias, card)
+
+    def parse(self, text: str) -> Optional[str]:
+        """Carta correspondente ao que o jogador digitou (None se não houver)"""
+        return self.lookup.get(text.strip().lower())
+
+    def __contains__(self, card) -> bool:
+        """Validação de um voto (busca em frozenset; o que não é texto nunca é carta)"""
+        return isinstance(card, str) and card in self.valid
+
+
+DEFAULT_DECK = 'fibonacci'
+
+# Baralhos disponíveis no CREATE_ROOM, na ordem em que o cliente os oferece
+DECKS: Dict[str, Deck] = {deck.name: deck for deck in (
+    Deck('fibonacci', ['0', '1', '2', '3', '5', '8', '13', '21'], bands=(4, 2)),
+    Deck('modified_fibonacci', ['0', '½', '1', '2', '3', '5', '8', '13', '20', '40', '100'],
+         values={'0': 0, '½': 0.5, '1': 1, '2': 2, '3': 3, '5': 5, '8': 8,
+                 '13': 13, '20': 20, '40': 40, '100': 100},
+         bands=(5, 3), aliases={'0.5': '½', '1/2': '½'}),
+    Deck('tshirt', ['XS', 'S', 'M', 'L', 'XL', 'XXL'], bands=(2, 2)),
+    Deck('powers_of_two', ['0', '1', '2', '4', '8', '16', '32', '64'], bands=(4, 2)),
+)}
+
+
+def get_deck(name: Optional[str] = None) -> Deck:
+    """Baralho pelo nome (o padrão se None ou desconhecido)"""
+    return DECKS.get(name) or DECKS[DEFAULT_DECK]
@@ -1,10 +1,17 @@
 class Player:
-    def __init__(self, player_id, name, connection=None):
+    # Sem __dict__: salas enormes guardam milhares destes
+    __slots__ = ('id', 'name', 'connection', 'current_vote', 'is_host',
+                 'resume_token', 'disconnected_at')
+    
+    def __init__(self, player_id, name, connection=None, resume_token=None):
         self.id = player_id
         self.name = name
         self.connection = connection
         self.current_vote = None
         self.is_host = False
+        # Segredo para retomar o lugar após uma queda, e quando a conexão caiu
+        self.resume_token = resume_token
+        self.disconnected_at = None
     
     def reset_vote(self):
         """Reseta o voto do jogador para uma nova rodada"""
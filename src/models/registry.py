@@ -0,0 +1,140 @@
+import random
+import string
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .deck import Deck, get_deck
+from .player import Player
+from .room import Room
+
+# Caracteres dos IDs de sala; no modo com vários processos, o primeiro
+# caractere identifica o processo dono da sala
+ROOM_ID_ALPHABET = string.ascii_uppercase + string.digits
+ROOM_ID_LENGTH = 6
+
+
+class RoomRegistry:
+    """Registro compartilhado de salas e conexões
+
+    É o único estado global do servidor. A trava protege apenas operações
+    O(1) de criação, remoção e busca; nenhuma E/S acontece com ela presa.
+    O estado de cada sala pertence ao ator da sala.
+
+    Com `shard_count` > 1 o registro guarda só as salas do processo
+    `shard`, e o ID de cada sala começa pelo caractere desse processo.
+    Com um `journal`, as salas registram nele suas operações e podem ser
+    recuperadas por restore() ao reiniciar.
+    """
+
+    def __init__(self, shard: int = 0, shard_count: int = 1, journal=None):
+        if not 0 <= shard < shard_count <= len(ROOM_ID_ALPHABET):
+            raise ValueError(f"Shard inválido: {shard}/{shard_count}")
+        self.shard = shard
+        self.shard_count = shard_count
+        self.journal = journal
+        self._lock = threading.Lock()
+        self.rooms: Dict[str, Room] = {}
+        self.clients: Dict[object, Player] = {}
+        self.client_rooms: Dict[object, Room] = {}
+
+    def generate_room_id(self) -> str:
+        """Gera ID único para sala (chamar com a trava presa)"""
+        prefix = ROOM_ID_ALPHABET[self.shard] if self.shard_count > 1 else ''
+        while True:
+            room_id = prefix + ''.join(random.choices(ROOM_ID_ALPHABET, k=ROOM_ID_LENGTH - len(prefix)))
+            if room_id not in self.rooms:
+                return room_id
+    
+    def shard_of(self, room_id: str) -> Optional[int]:
+        """Processo dono da sala, pelo primeiro caractere do ID (None se inválido)"""
+        if self.shard_count == 1:
+            return self.shard
+        owner = ROOM_ID_ALPHABET.find(room_id[:1]) if room_id else -1
+        return owner if 0 <= owner < self.shard_count else None
+
+    def create_room(self, host_player: Player, connection, mailbox, deck: Optional[Deck] = None) -> Room:
+        """Cria e registra uma sala, já associando a conexão do host"""
+        with self._lock:
+            room = Room(self.generate_room_id(), host_player, self.journal, deck)
+            room.mailbox = mailbox
+            self.rooms[room.id] = room
+            self.clients[connection] = host_player
+            self.client_rooms[connection] = room
+            return room
+
+    def get(self, room_id: str) -> Optional[Room]:
+        """Busca uma sala registrada"""
+        return self.rooms.get(room_id)
+
+    def is_open(self, room: Room) -> bool:
+        """Indica se a sala ainda está registrada (não foi removida por ficar vazia)"""
+        return self.rooms.get(room.id) is room
+
+    def remove_room(self, room: Room):
+        """Remove uma sala vazia"""
+        with self._lock:
+            if self.rooms.get(room.id) is room:
+                del self.rooms[room.id]
+
+    def attach(self, connection, player: Player, room: Room):
+        """Associa a conexão a um jogador e sua sala"""
+        with self._lock:
+            self.clients[connection] = player
+            self.client_rooms[connection] = room
+
+    def detach(self, connection) -> Tuple[Optional[Player], Optional[Room]]:
+        """Desfaz a associação da conexão, devolvendo jogador e sala"""
+        with self._lock:
+            return self.clients.pop(connection, None), self.client_rooms.pop(connection, None)
+
+    def lookup(self, connection) -> Tuple[Optional[Player], Optional[Room]]:
+        """Jogador e sala associados à conexão"""
+        with self._lock:
+            return self.clients.get(connection), self.client_rooms.get(connection)
+
+    def all_rooms(self) -> List[Room]:
+        """Cópia das salas registradas"""
+        with self._lock:
+            return list(self.rooms.values())
+
+    def restore(self, new_mailbox) -> int:
+        """Recarrega as salas do journal: snapshot mais o log gravado depois dele
+
+        Cada sala do snapshot só reaplica as entradas com seq maior que o
+        seu; salas que esvaziaram no log não voltam. Os jogadores voltam
+        sem conexão. Devolve o número de salas recuperadas.
+        """
+        snapshot, entries = self.journal.load()
+        rooms: Dict[str, Room] = {}
+        for state in (snapshot or {}).get('rooms', []):
+            rooms[state['id']] = Room.from_snapshot(state)
+
+        for seq, room_id, op, *args in entries:
+            room = rooms.get(room_id)
+            if op == 'create':
+                if room is None:
+                    # Journals anteriores aos baralhos não gravam o nome (Fibonacci)
+                    deck = get_deck(args[3] if len(args) > 3 else None)
+                    host = Player(args[0], args[1], resume_token=args[2])
+                    room = rooms[room_id] = Room(room_id, host, deck=deck)
+                    room.journal_seq = seq
+                continue
+            if room is None or seq <= room.journal_seq:
+                continue
+            room.replay(op, args)
+            room.journal_seq = seq
+            if not room.players:
+                del rooms[room_id]
+
+        with self._lock:
+            for room in rooms.values():
+                room.take_events()
+                room.mailbox = new_mailbox()
+                room.journal = self.journal
+                self.rooms[room.id] = room
+        return len(rooms)
+
+    def connections(self) -> List[object]:
+        """Cópia das conexões associadas a salas"""
+        with self._lock:
+            return list(self.clients)
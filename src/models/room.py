@@ -1,33 +1,69 @@
-from typing import Dict, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from .deck import Deck, get_deck
 from .player import Player
+from src.utils.network import MSG_TYPES, encode_message
 
 class Room:
-    # Cartas disponíveis no Planning Poker
-    VALID_CARDS = ['0', '1', '2', '3', '5', '8', '13', '21', '?', '☕']
+    # Amplitude máxima (em pontos) de cada nível de consenso; acima do último é 'wide'
+    CONSENSUS_LEVELS = ((0, 'total'), (1, 'close'), (3, 'fair'), (8, 'moderate'))
+    # O mesmo em passos na escala, para baralhos sem números (camisetas)
+    CONSENSUS_STEPS = ((0, 'total'), (1, 'close'), (2, 'fair'), (4, 'moderate'))
+    # Limites da fila de histórias de uma sala
+    MAX_BACKLOG = 1000
+    MAX_STORY_LENGTH = 500
     
-    def __init__(self, room_id: str, host_player: Player):
+    def __init__(self, room_id: str, host_player: Player, journal=None,
+                 deck: Optional[Deck] = None):
         self.id = room_id
+        # Baralho escolhido no CREATE_ROOM (validação, ordem e valores das cartas)
+        self.deck = deck or get_deck()
         self.players: Dict[str, Player] = {}
         self.host_id = host_player.id
         self.is_voting = False
         self.votes_revealed = False
         self.current_story = ""
+        # Fila de histórias carregada pelo host (LOAD_BACKLOG), consumida por next_story()
+        self.backlog: Deque[str] = deque()
+        # Contagem incremental da rodada: quem votou e quantos votos por carta
+        # (all_voted e os resumos não percorrem os jogadores)
+        self.voters: Dict[str, Player] = {}
+        self.tally: Dict[str, int] = {}
+        # Resumo calculado na revelação e enviado junto com ela
+        self.summary: Optional[dict] = None
+        # Executor serial (ator) da sala, atribuído pelo servidor
+        self.mailbox = None
+        # Versão do estado: cada mutação visível incrementa e gera um evento
+        self.version = 0
+        self._events: List[dict] = []
+        self._events_base = 0
+        # Quadros ROOM_STATUS já codificados da versão atual, por codec
+        self._status_frames = {}
+        # Já existe um envio de deltas agendado (janela de coalescência)
+        self.flush_scheduled = False
+        # Log de operações para recuperação (None = sem persistência) e o
+        # seq da última entrada desta sala
+        self.journal = journal
+        self.journal_seq = 0
         
         # Adiciona o host como primeiro jogador
         host_player.is_host = True
         self.players[host_player.id] = host_player
+        self._log('create', host_player.id, host_player.name, host_player.resume_token, self.deck.name)
     
     def add_player(self, player: Player) -> bool:
         """Adiciona um jogador à sala"""
         if player.id not in self.players:
             self.players[player.id] = player
+            self._record('player_joined', player=player.to_dict())
+            self._log('join', player.id, player.name, player.resume_token)
             return True
         return False
     
     def remove_player(self, player_id: str) -> bool:
         """Remove um jogador da sala"""
         if player_id in self.players:
-            del self.players[player_id]
+            self._discard_vote(self.players.pop(player_id))
             
             # Se o host saiu, transfere para outro jogador
             if player_id == self.host_id and self.players:
@@ -35,6 +71,12 @@ class Room:
                 new_host.is_host = True
                 self.host_id = new_host.id
             
+            if self.votes_revealed:
+                # O resumo revelado perdeu um voto: segue recalculado no evento
+                self._record('player_left', player_id=player_id, host_id=self.host_id, summary=self.summary)
+            else:
+                self._record('player_left', player_id=player_id, host_id=self.host_id)
+            self._log('leave', player_id)
             return True
         return False
     
@@ -44,35 +86,81 @@ class Room:
             self.is_voting = True
             self.votes_revealed = False
             self.current_story = story
+            self.summary = None
+            self._clear_votes()
             
-            # Reseta votos de todos os jogadores
-            for player in self.players.values():
-                player.reset_vote()
-            
+            self._record('voting_started', story=story)
+            self._log('start', story)
             return True
         return False
     
+    def load_backlog(self, stories: list, replace: bool = False) -> int:
+        """Acrescenta histórias à fila (replace=True começa outra); devolve quantas entraram"""
+        if replace:
+            self.backlog.clear()
+        space = self.MAX_BACKLOG - len(self.backlog)
+        accepted = [story.strip()[:self.MAX_STORY_LENGTH] for story in stories
+                    if isinstance(story, str) and story.strip()][:space]
+        self.backlog.extend(accepted)
+        self._record_backlog()
+        self._log('backlog', accepted, replace)
+        return len(accepted)
+    
+    def next_story(self) -> Optional[str]:
+        """Abre a votação da próxima história da fila, encerrando a rodada atual"""
+        if not self.backlog:
+            return None
+        story = self.backlog.popleft()
+        # Reset e início numa só operação: o evento voting_started já zera os votos
+        self.is_voting = True
+        self.votes_revealed = False
+        self.current_story = story
+        self.summary = None
+        self._clear_votes()
+        self._record('voting_started', story=story)
+        self._record_backlog()
+        self._log('next')
+        return story
+    
+    def _record_backlog(self):
+        """Evento com o tamanho da fila e a próxima história (não a fila inteira)"""
+        self._record('backlog_changed', count=len(self.backlog),
+                     next=self.backlog[0] if self.backlog else None)
+    
     def submit_vote(self, player_id: str, vote: str) -> bool:
         """Registra o voto de um jogador"""
         if (player_id in self.players and 
             self.is_voting and 
             not self.votes_revealed and
-            vote in self.VALID_CARDS):
+            vote in self.deck):
             
-            self.players[player_id].current_vote = vote
+            player = self.players[player_id]
+            first_vote = player.current_vote is None
+            self._discard_vote(player)
+            self._count_vote(player, vote)
+            # Trocar de voto não gera delta (nada visível antes da revelação),
+            # mas o snapshot inclui o voto
+            if first_vote:
+                self._record('player_voted', player_id=player_id)
+            else:
+                self._status_frames.clear()
+            self._log('vote', player_id, vote)
             return True
         return False
     
     def all_voted(self) -> bool:
         """Verifica se todos votaram"""
-        if not self.players:
-            return False
-        return all(p.current_vote is not None for p in self.players.values())
+        return bool(self.players) and len(self.voters) == len(self.players)
     
     def reveal_votes(self) -> bool:
         """Revela todos os votos"""
         if self.is_voting:
             self.votes_revealed = True
+            self.summary = self.summarize()
+            self._record('votes_revealed', votes={
+                player_id: p.current_vote for player_id, p in self.voters.items()
+            }, summary=self.summary)
+            self._log('reveal')
             return True
         return False
     
@@ -81,17 +169,202 @@ class Room:
         self.is_voting = False
         self.votes_revealed = False
         self.current_story = ""
-        for player in self.players.values():
+        self.summary = None
+        self._clear_votes()
+        self._record('round_reset')
+        self._log('reset')
+    
+    def summarize(self) -> dict:
+        """Resumo da rodada a partir da contagem por carta (O(cartas))"""
+        deck = self.deck
+        counts = sorted(([card, n] for card, n in self.tally.items()), key=lambda entry: deck.order[entry[0]])
+        summary = {'counts': counts, 'total': len(self.voters)}
+        ranked = [card for card, _ in counts if card in deck.ranks]
+        if not ranked:
+            return summary
+        low, high = ranked[0], ranked[-1]
+        summary.update(min=low, max=high)
+        numeric = [(deck.values[card], n) for card, n in counts if card in deck.values]
+        if numeric:
+            spread = numeric[-1][0] - numeric[0][0]
+            levels = self.CONSENSUS_LEVELS
+            summary.update(
+                mean=sum(value * n for value, n in numeric) / sum(n for _, n in numeric),
+                spread=spread
+            )
+        else:
+            spread = deck.ranks[high] - deck.ranks[low]
+            levels = self.CONSENSUS_STEPS
+        summary['consensus'] = next((level for limit, level in levels if spread <= limit), 'wide')
+        return summary
+    
+    def _count_vote(self, player: Player, vote: str):
+        """Registra o voto do jogador na contagem"""
+        player.current_vote = vote
+        self.voters[player.id] = player
+        self.tally[vote] = self.tally.get(vote, 0) + 1
+    
+    def _discard_vote(self, player: Player):
+        """Tira o voto do jogador (se houver) da contagem"""
+        vote = player.current_vote
+        if vote is None:
+            return
+        player.reset_vote()
+        del self.voters[player.id]
+        if self.tally[vote] == 1:
+            del self.tally[vote]
+        else:
+            self.tally[vote] -= 1
+        if self.votes_revealed:
+            self.summary = self.summarize()
+    
+    def _clear_votes(self):
+        """Zera a rodada, tocando só em quem votou"""
+        for player in self.voters.values():
             player.reset_vote()
+        self.voters.clear()
+        self.tally.clear()
     
     def get_status(self) -> dict:
         """Retorna o status atual da sala"""
         return {
             'room_id': self.id,
+            'deck': self.deck.name,
             'host_id': self.host_id,
             'is_voting': self.is_voting,
             'votes_revealed': self.votes_revealed,
             'current_story': self.current_story,
             'players': [p.to_dict() for p in self.players.values()],
-            'all_voted': self.all_voted()
-        }
\ No newline at end of file
+            'all_voted': self.all_voted(),
+            'summary': self.summary,
+            'backlog': len(self.backlog),
+            'next_story': self.backlog[0] if self.backlog else None,
+            'version': self.version
+        }
+    
+    def encoded_status(self, codec=None) -> bytes:
+        """Quadro ROOM_STATUS do estado atual, codificado uma vez por versão e codec"""
+        frame = self._status_frames.get(codec)
+        if frame is None:
+            frame = encode_message(MSG_TYPES['ROOM_STATUS'], self.get_status(), codec)
+            self._status_frames[codec] = frame
+        return frame
+    
+    def _record(self, event: str, **data):
+        """Registra uma mutação como evento de delta e avança a versão"""
+        if not self._events:
+            self._events_base = self.version
+        self.version += 1
+        self._status_frames.clear()
+        data['event'] = event
+        self._events.append(data)
+    
+    def _log(self, op: str, *args):
+        """Acrescenta a operação ao journal (a sala só muda dentro do seu ator)"""
+        if self.journal is not None:
+            self.journal_seq = self.journal.append(self.id, op, *args)
+    
+    def replay(self, op: str, args: list):
+        """Reaplica uma operação do journal (recuperação)"""
+        if op == 'join':
+            self.add_player(Player(args[0], args[1], resume_token=args[2]))
+        elif op == 'leave':
+            self.remove_player(args[0])
+        elif op == 'start':
+            self.start_voting(args[0])
+        elif op == 'vote':
+            self.submit_vote(args[0], args[1])
+        elif op == 'reveal':
+            self.reveal_votes()
+        elif op == 'reset':
+            self.reset_round()
+        elif op == 'backlog':
+            self.load_backlog(args[0], args[1])
+        elif op == 'next':
+            self.next_story()
+    
+    def to_snapshot(self) -> dict:
+        """Estado completo da sala, incluindo votos ocultos, para o snapshot do journal"""
+        return {
+            'id': self.id,
+            'deck': self.deck.name,
+            'host_id': self.host_id,
+            'is_voting': self.is_voting,
+            'votes_revealed': self.votes_revealed,
+            'current_story': self.current_story,
+            'version': self.version,
+            'seq': self.journal_seq,
+            'backlog': list(self.backlog),
+            # Em ordem de entrada: define quem herda o host
+            'players': [[p.id, p.name, p.current_vote, p.resume_token] for p in self.players.values()]
+        }
+    
+    @classmethod
+    def from_snapshot(cls, state: dict) -> 'Room':
+        """Reconstrói uma sala a partir de to_snapshot() (jogadores sem conexão)"""
+        players = [Player(player_id, name, resume_token=token) for player_id, name, _, token in state['players']]
+        room = cls(state['id'], players[0], deck=get_deck(state.get('deck')))
+        players[0].is_host = False
+        for player, (_, _, vote, _) in zip(players, state['players']):
+            if vote is not None:
+                room._count_vote(player, vote)
+            player.is_host = player.id == state['host_id']
+            room.players[player.id] = player
+        room.host_id = state['host_id']
+        room.is_voting = state['is_voting']
+        room.votes_revealed = state['votes_revealed']
+        room.current_story = state['current_story']
+        room.backlog.extend(state.get('backlog', ()))
+        if room.votes_revealed:
+            room.summary = room.summarize()
+        room.version = state['version']
+        room.journal_seq = state['seq']
+        return room
+    
+    def take_events(self) -> Tuple[int, List[dict]]:
+        """Devolve (versão base, eventos) pendentes e limpa a lista"""
+        events, self._events = self._events, []
+        return self._events_base, events
+    
+    @staticmethod
+    def apply_events(status: dict, events: List[dict]) -> dict:
+        """Aplica eventos de delta a uma cópia de um status (lado do cliente)"""
+        status = dict(status)
+        players = [dict(p) for p in status.get('players', [])]
+        
+        for event in events:
+            kind = event.get('event')
+            if kind == 'player_joined':
+                players.append(dict(event['player']))
+            elif kind == 'player_left':
+                players = [p for p in players if p['id'] != event['player_id']]
+                status['host_id'] = event['host_id']
+                if 'summary' in event:
+                    status['summary'] = event['summary']
+                for p in players:
+                    p['is_host'] = p['id'] == event['host_id']
+            elif kind == 'voting_started':
+                status.update(is_voting=True, votes_revealed=False, current_story=event['story'], summary=None)
+                for p in players:
+                    p.update(has_voted=False, vote=None)
+            elif kind == 'player_voted':
+                for p in players:
+                    if p['id'] == event['player_id']:
+                        p['has_voted'] = True
+            elif kind == 'votes_revealed':
+                status['votes_revealed'] = True
+                status['summary'] = event.get('summary')
+                votes = event['votes']
+                for p in players:
+                    p['vote'] = votes.get(p['id'])
+                    p['has_voted'] = p['vote'] is not None
+            elif kind == 'backlog_changed':
+                status.update(backlog=event['count'], next_story=event['next'])
+            elif kind == 'round_reset':
+                status.update(is_voting=False, votes_revealed=False, current_story="", summary=None)
+                for p in players:
+                    p.update(has_voted=False, vote=None)
+        
+        status['players'] = players
+        status['all_voted'] = bool(players) and all(p['has_voted'] for p in players)
+        return status
\ No newline at end of file
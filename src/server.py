@@ -6,51 +6,135 @@ Gerencia salas, jogadores e comunicação entre clientes
 import socket
 import threading
 import json
+import secrets
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Dict, Optional
 
 from src.models.room import Room
 from src.models.player import Player
+from src.models.deck import DECKS
+from src.models.registry import RoomRegistry
+from src.utils import log, metrics
+from src.utils.actor import SerialExecutor
+from src.utils.connection import SocketConnection
+from src.utils.journal import Journal
+from src.utils.timers import TimerScheduler
 from src.utils.network import (
-    DEFAULT_HOST, DEFAULT_PORT, BUFFER_SIZE,
-    MSG_TYPES, parse_message, send_message
+    DEFAULT_HOST, DEFAULT_PORT, BUFFER_SIZE, LISTEN_BACKLOG, OUTBOUND_HIGH_WATER,
+    MSG_TYPES, FrameDecoder, FrameTooLarge, encode_message, send_message
 )
+from src.utils.codec import JSON, decode_message, negotiate
 from src.utils.display import print_header, print_success, print_error, print_info
 
+# Intervalo (segundos) entre os resumos no console (sem endpoint de métricas)
+STATUS_INTERVAL = 30
+
+# Tipos conhecidos; o resto é contado como 'unknown' (rótulos limitados)
+KNOWN_TYPES = frozenset(MSG_TYPES.values())
+
+# Threads que executam os atores das salas (motor com threads)
+ROOM_WORKERS = 16
+
+# Janela (segundos) em que as mutações de uma sala viram um único delta
+COALESCE_WINDOW = 0.025
+
+# Intervalo (segundos) de silêncio após o qual o servidor manda PING, e o
+# silêncio máximo antes de encerrar a conexão (meio-aberta, cliente dormindo)
+HEARTBEAT_INTERVAL = 15
+IDLE_TIMEOUT = 45
+
+# Tempo (segundos) que o lugar de um jogador desconectado fica reservado
+RESUME_GRACE = 60
+
+# Intervalo (segundos) entre snapshots do journal, e a espera máxima pelos atores
+SNAPSHOT_INTERVAL = 60
+SNAPSHOT_TIMEOUT = 10
+
+
+def shard_port(port: int, shard: int) -> int:
+    """Porta própria de um processo no modo com vários processos"""
+    return port + 1 + shard
+
 
 class PlanningPokerServer:
-    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, room_workers=ROOM_WORKERS,
+                 outbound_high_water=OUTBOUND_HIGH_WATER, coalesce_window=COALESCE_WINDOW,
+                 metrics_port=None, shard=0, shard_count=1, journal_dir=None, resume_grace=RESUME_GRACE,
+                 heartbeat_interval=HEARTBEAT_INTERVAL, idle_timeout=IDLE_TIMEOUT):
         self.host = host
         self.port = port
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        self.outbound_high_water = outbound_high_water
+        self.coalesce_window = coalesce_window
+        self.resume_grace = resume_grace
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
         self.server_socket = None
-        self.rooms: Dict[str, Room] = {}
-        self.clients: Dict[socket.socket, Player] = {}
+        # Porta própria deste processo (só com vários processos), destino dos redirecionamentos
+        self.shard_socket = None
+        # Log das salas para sobreviver a reinícios (None = só em memória)
+        self.journal = Journal(journal_dir) if journal_dir else None
+        # Único estado compartilhado: criação e busca de salas/conexões
+        self.registry = RoomRegistry(shard, shard_count, self.journal)
         self.running = False
-        self.lock = threading.Lock()
+        # Conexões abertas (com ou sem sala), do accept ao fechamento
+        self.open_connections = set()
+        # Marcado só por stop(): a partir daí os atores não recebem mais trabalho
+        self.stopping = False
+        # Cada sala é um ator; seus handlers rodam serialmente neste pool
+        self.pool = ThreadPoolExecutor(max_workers=room_workers, thread_name_prefix='room')
+        self.timers = TimerScheduler(self.on_actor_error)
+        self.room_handlers = {
+            MSG_TYPES['START_VOTING']: self.start_voting,
+            MSG_TYPES['SUBMIT_VOTE']: self.submit_vote,
+            MSG_TYPES['REVEAL_VOTES']: self.reveal_votes,
+            MSG_TYPES['RESET_ROUND']: self.reset_round,
+            MSG_TYPES['GET_ROOM_STATUS']: self.get_room_status,
+            MSG_TYPES['LEAVE_ROOM']: self.leave_room,
+            MSG_TYPES['LOAD_BACKLOG']: self.load_backlog,
+            MSG_TYPES['NEXT_STORY']: self.next_story,
+        }
         
     def start(self):
         """Inicia o servidor"""
         try:
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
+            sharded = self.registry.shard_count > 1
+            if self.journal:
+                self.restore_rooms()
+            # Com vários processos, o kernel distribui as conexões da porta comum
+            self.server_socket = self.listen(self.port, reuse_port=sharded)
+            if sharded:
+                self.shard_socket = self.listen(shard_port(self.port, self.registry.shard))
             self.running = True
             
-            print_header("PLANNING POKER - SERVIDOR")
-            print_success(f"Servidor rodando em {self.host}:{self.port}")
-            print_info("Pressione Ctrl+C para parar o servidor\n")
+            if sharded:
+                print_success(f"Processo {self.registry.shard + 1}/{self.registry.shard_count} rodando em "
+                              f"{self.host}:{self.port} (porta própria {shard_port(self.port, self.registry.shard)})")
+            else:
+                print_header("PLANNING POKER - SERVIDOR")
+                print_success(f"Servidor rodando em {self.host}:{self.port}")
+                print_info("Pressione Ctrl+C para parar o servidor\n")
             
-            # Thread para aceitar conexões
-            accept_thread = threading.Thread(target=self.accept_connections)
-            accept_thread.daemon = True
-            accept_thread.start()
+            # Threads para aceitar conexões
+            for listener in (self.server_socket, self.shard_socket):
+                if listener:
+                    accept_thread = threading.Thread(target=self.accept_connections, args=(listener,))
+                    accept_thread.daemon = True
+                    accept_thread.start()
             
-            # Thread para mostrar status
-            status_thread = threading.Thread(target=self.print_status)
-            status_thread.daemon = True
-            status_thread.start()
+            # Métricas no endpoint HTTP ou, sem ele, um resumo periódico
+            if self.metrics_port is not None:
+                self.start_metrics()
+            else:
+                status_thread = threading.Thread(target=self.print_status)
+                status_thread.daemon = True
+                status_thread.start()
+            if self.journal:
+                self.start_snapshots()
             
             # Mantém o servidor rodando
             try:
@@ -63,323 +147,706 @@ class PlanningPokerServer:
             print_error(f"Erro ao iniciar servidor: {e}")
             self.stop()
     
-    def accept_connections(self):
+    def listen(self, port: int, reuse_port: bool = False) -> socket.socket:
+        """Abre um socket de escuta"""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        listener.bind((self.host, port))
+        listener.listen(LISTEN_BACKLOG)
+        return listener
+    
+    def accept_connections(self, listener: socket.socket):
         """Aceita novas conexões de clientes"""
         while self.running:
             try:
-                client_socket, address = self.server_socket.accept()
-                print_success(f"Nova conexão de {address[0]}:{address[1]}")
+                client_socket, address = listener.accept()
+                log.info('connection_opened', address=f"{address[0]}:{address[1]}")
+                # Sem Nagle: a confirmação do voto e o delta seguinte saem em
+                # quadros pequenos e o segundo esperaria o ACK atrasado (~40 ms)
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                connection = SocketConnection(client_socket, address, self.outbound_high_water)
+                self.open_connections.add(connection)
+                self.watch_connection(connection)
                 
                 # Cria thread para lidar com o cliente
                 client_thread = threading.Thread(
                     target=self.handle_client,
-                    args=(client_socket, address)
+                    args=(connection, address)
                 )
                 client_thread.daemon = True
                 client_thread.start()
                 
             except Exception as e:
                 if self.running:
-                    print_error(f"Erro ao aceitar conexão: {e}")
+                    log.error('accept_failed', error=str(e))
     
-    def handle_client(self, client_socket: socket.socket, address):
+    def handle_client(self, client_socket: SocketConnection, address):
         """Gerencia a comunicação com um cliente específico"""
-        player = None
+        decoder = FrameDecoder()
         try:
             while self.running:
-                data = client_socket.recv(BUFFER_SIZE).decode('utf-8')
+                data = client_socket.recv(BUFFER_SIZE)
                 if not data:
                     break
                 
-                message = parse_message(data)
-                if not message:
-                    continue
-                
-                msg_type = message.get('type')
-                msg_data = message.get('data', {})
-                
-                # Processa mensagem baseado no tipo
-                if msg_type == MSG_TYPES['CREATE_ROOM']:
-                    player = self.create_room(client_socket, msg_data)
-                    
-                elif msg_type == MSG_TYPES['JOIN_ROOM']:
-                    player = self.join_room(client_socket, msg_data)
-                    
-                elif msg_type == MSG_TYPES['START_VOTING']:
-                    self.start_voting(client_socket, msg_data)
-                    
-                elif msg_type == MSG_TYPES['SUBMIT_VOTE']:
-                    self.submit_vote(client_socket, msg_data)
-                    
-                elif msg_type == MSG_TYPES['REVEAL_VOTES']:
-                    self.reveal_votes(client_socket)
-                    
-                elif msg_type == MSG_TYPES['RESET_ROUND']:
-                    self.reset_round(client_socket)
+                for frame in decoder.feed(data):
+                    message = decode_message(frame)
+                    if message:
+                        self.dispatch_message(client_socket, message)
                     
+        except FrameTooLarge as e:
+            log.warning('frame_too_large', address=f"{address[0]}:{address[1]}", error=str(e))
         except Exception as e:
-            print_error(f"Erro com cliente {address}: {e}")
+            log.error('connection_error', exc_info=e, address=f"{address[0]}:{address[1]}")
         finally:
+            self.open_connections.discard(client_socket)
             self.disconnect_client(client_socket)
     
-    def create_room(self, client_socket: socket.socket, data: dict) -> Optional[Player]:
-        """Cria uma nova sala"""
-        with self.lock:
-            try:
-                player_name = data.get('player_name', 'Jogador')
-                room_id = self.generate_room_id()
-                player_id = str(uuid.uuid4())[:8]
-                
-                # Cria jogador e sala
-                player = Player(player_id, player_name, client_socket)
-                room = Room(room_id, player)
-                
-                self.rooms[room_id] = room
-                self.clients[client_socket] = player
-                
-                # Envia confirmação
-                send_message(client_socket, MSG_TYPES['SUCCESS'], {
-                    'room_id': room_id,
-                    'player_id': player_id,
-                    'message': f'Sala {room_id} criada com sucesso!'
-                })
-                
-                # Envia status da sala
-                self.broadcast_room_status(room_id)
-                
-                print_info(f"Sala {room_id} criada por {player_name}")
-                return player
-                
-            except Exception as e:
+    def dispatch_message(self, client_socket, message: dict):
+        """Processa uma mensagem já decodificada (comum a todos os motores)"""
+        msg_type = message.get('type')
+        msg_data = message.get('data', {})
+        # Id da requisição, devolvido na resposta (None para clientes antigos)
+        request_id = message.get('id')
+        metrics.MESSAGES_IN.inc(1, msg_type if msg_type in KNOWN_TYPES else 'unknown')
+        started = time.perf_counter()
+        
+        # Processa mensagem baseado no tipo
+        if msg_type == MSG_TYPES['HELLO']:
+            self.negotiate_codec(client_socket, msg_data, request_id)
+            
+        elif msg_type == MSG_TYPES['CREATE_ROOM']:
+            self.create_room(client_socket, msg_data, request_id)
+            
+        elif msg_type == MSG_TYPES['JOIN_ROOM']:
+            self.join_room(client_socket, msg_data, request_id)
+            
+        elif msg_type == MSG_TYPES['RESUME']:
+            self.resume_session(client_socket, msg_data, request_id)
+            
+        elif msg_type == MSG_TYPES['PING']:
+            send_message(client_socket, MSG_TYPES['PONG'], None, request_id)
+            
+        elif msg_type in self.room_handlers:
+            # Demais mensagens vão para a caixa de correio da sala do cliente
+            player, room = self.registry.lookup(client_socket)
+            if room:
+                room.mailbox.submit(self.run_handler, msg_type, client_socket, player, room, msg_data, request_id)
+            elif request_id is not None:
+                # Quem espera a resposta não pode ficar sem ela
                 send_message(client_socket, MSG_TYPES['ERROR'], {
-                    'message': f'Erro ao criar sala: {e}'
-                })
-                return None
+                    'message': 'Você não está em nenhuma sala!'
+                }, request_id)
+            return
+        
+        else:
+            return
+        metrics.HANDLER_SECONDS.observe(time.perf_counter() - started, msg_type)
     
-    def join_room(self, client_socket: socket.socket, data: dict) -> Optional[Player]:
-        """Adiciona jogador a uma sala existente"""
-        with self.lock:
-            try:
-                room_id = data.get('room_id', '').upper()
-                player_name = data.get('player_name', 'Jogador')
-                
-                if room_id not in self.rooms:
-                    send_message(client_socket, MSG_TYPES['ERROR'], {
-                        'message': f'Sala {room_id} não encontrada!'
-                    })
-                    return None
-                
-                room = self.rooms[room_id]
-                player_id = str(uuid.uuid4())[:8]
-                player = Player(player_id, player_name, client_socket)
-                
-                if room.add_player(player):
-                    self.clients[client_socket] = player
-                    
-                    send_message(client_socket, MSG_TYPES['SUCCESS'], {
-                        'room_id': room_id,
-                        'player_id': player_id,
-                        'message': f'Entrou na sala {room_id}!'
-                    })
-                    
-                    self.broadcast_room_status(room_id)
-                    print_info(f"{player_name} entrou na sala {room_id}")
-                    return player
-                else:
-                    send_message(client_socket, MSG_TYPES['ERROR'], {
-                        'message': 'Erro ao entrar na sala!'
-                    })
-                    return None
-                    
-            except Exception as e:
-                send_message(client_socket, MSG_TYPES['ERROR'], {
-                    'message': f'Erro ao entrar na sala: {e}'
-                })
-                return None
+    def run_handler(self, msg_type: str, client_socket, player: Player, room: Room, data: dict,
+                    request_id=None):
+        """Executa um handler de sala medindo sua duração (dentro do ator)"""
+        started = time.perf_counter()
+        try:
+            self.room_handlers[msg_type](client_socket, player, room, data, request_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.HANDLER_SECONDS.observe(elapsed, msg_type)
+            log.debug('message_handled', type=msg_type, room=room.id, player=player.id,
+                      duration_ms=round(elapsed * 1000, 3))
     
-    def start_voting(self, client_socket: socket.socket, data: dict):
-        """Inicia uma rodada de votação"""
-        with self.lock:
-            player = self.clients.get(client_socket)
-            if not player:
-                return
-            
-            room = self.find_player_room(player.id)
-            if not room:
+    def negotiate_codec(self, client_socket, data: dict, request_id=None):
+        """Escolhe o codec das mensagens enviadas a este cliente"""
+        codec = negotiate(data.get('codecs'))
+        # A resposta vai em JSON: o cliente só troca de codec ao recebê-la
+        send_message(client_socket, MSG_TYPES['HELLO'], {'codec': codec.name}, request_id)
+        client_socket.codec = None if codec is JSON else codec
+    
+    def watch_connection(self, connection):
+        """Agenda a verificação de silêncio da conexão no heap de timers"""
+        if self.idle_timeout:
+            self.call_later(self.heartbeat_interval or self.idle_timeout, self.check_idle, connection)
+    
+    def check_idle(self, connection):
+        """Manda PING a uma conexão silenciosa e encerra a que passou do limite
+
+        Roda na thread de timers (ou no event loop) e só reagenda a si mesma:
+        uma entrada no heap por conexão, sem thread dormindo por cliente. O
+        encerramento segue o caminho normal de queda (lugar reservado).
+        """
+        if connection.closed or not self.running:
+            return
+        idle = time.monotonic() - connection.last_seen
+        if idle >= self.idle_timeout:
+            metrics.REAPED_CONNECTIONS.inc()
+            log.info('connection_reaped', idle_s=round(idle, 1))
+            connection.close()
+            return
+        interval = self.heartbeat_interval or self.idle_timeout
+        if idle >= interval:
+            send_message(connection, MSG_TYPES['PING'])
+            delay = min(interval, self.idle_timeout - idle)
+        else:
+            delay = interval - idle
+        self.call_later(delay, self.check_idle, connection)
+    
+    def spawn(self, task) -> bool:
+        """Agenda a execução de um ator com trabalho pendente (False se recusada)"""
+        # No encerramento o pool é desligado: quedas de conexão e timers
+        # atrasados ainda tentam acordar atores, e não há mais o que fazer
+        if self.stopping:
+            return False
+        try:
+            self.pool.submit(task)
+        except RuntimeError:
+            if not self.stopping:
+                raise
+            return False
+        return True
+    
+    def call_later(self, delay: float, callback, *args):
+        """Agenda uma chamada futura (thread de timers)"""
+        return self.timers.call_later(delay, callback, *args)
+    
+    def new_mailbox(self) -> SerialExecutor:
+        """Cria o executor serial de uma sala"""
+        return SerialExecutor(self.spawn, self.on_actor_error)
+    
+    def on_actor_error(self, error: Exception):
+        """Erro não tratado dentro do ator de uma sala"""
+        log.error('actor_error', exc_info=error)
+    
+    def create_room(self, client_socket: socket.socket, data: dict, request_id=None):
+        """Cria uma nova sala"""
+        try:
+            player_name = data.get('player_name', 'Jogador')
+            player_id = str(uuid.uuid4())[:8]
+            deck_name = data.get('deck')
+            if deck_name is not None and deck_name not in DECKS:
                 send_message(client_socket, MSG_TYPES['ERROR'], {
-                    'message': 'Você não está em nenhuma sala!'
-                })
+                    'message': f'Baralho desconhecido: {deck_name}'
+                }, request_id)
                 return
             
-            # Verifica se é o host
-            if player.id != room.host_id:
-                send_message(client_socket, MSG_TYPES['ERROR'], {
-                    'message': 'Apenas o host pode iniciar a votação!'
-                })
-                return
+            # Cria jogador e sala
+            player = Player(player_id, player_name, client_socket, secrets.token_urlsafe(16))
+            room = self.registry.create_room(player, client_socket, self.new_mailbox(),
+                                             DECKS.get(deck_name))
+            room.mailbox.submit(self._room_created, client_socket, player, room, request_id)
             
-            story = data.get('story', '')
-            if room.start_voting(story):
-                self.broadcast_room_status(room.id)
-                print_info(f"Votação iniciada na sala {room.id}: {story[:50]}")
-            else:
-                send_message(client_socket, MSG_TYPES['ERROR'], {
-                    'message': 'Votação já está em andamento!'
-                })
+        except Exception as e:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': f'Erro ao criar sala: {e}'
+            }, request_id)
     
-    def submit_vote(self, client_socket: socket.socket, data: dict):
-        """Registra o voto de um jogador"""
-        with self.lock:
-            player = self.clients.get(client_socket)
-            if not player:
-                return
+    def _room_created(self, client_socket, player: Player, room: Room, request_id=None):
+        """Confirma a criação da sala (dentro do ator)"""
+        # Envia confirmação
+        send_message(client_socket, MSG_TYPES['SUCCESS'], {
+            'room_id': room.id,
+            'player_id': player.id,
+            'resume_token': self.session_token(room, player),
+            'message': f'Sala {room.id} criada com sucesso!'
+        }, request_id)
+        
+        # Envia status da sala
+        room.take_events()
+        self.send_room_status(client_socket, room)
+        
+        log.info('room_created', room=room.id, player=player.id, name=player.name)
+    
+    def join_room(self, client_socket: socket.socket, data: dict, request_id=None):
+        """Adiciona jogador a uma sala existente"""
+        try:
+            room_id = data.get('room_id', '').upper()
+            player_name = data.get('player_name', 'Jogador')
             
-            room = self.find_player_room(player.id)
-            if not room:
+            owner = self.registry.shard_of(room_id)
+            if owner is not None and owner != self.registry.shard:
+                # Sala de outro processo: o cliente reconecta na porta própria dele
+                send_message(client_socket, MSG_TYPES['REDIRECT'], {
+                    'room_id': room_id,
+                    'port': shard_port(self.port, owner)
+                }, request_id)
                 return
             
-            vote = data.get('vote')
-            if room.submit_vote(player.id, vote):
-                send_message(client_socket, MSG_TYPES['SUCCESS'], {
-                    'message': 'Voto registrado!'
-                })
-                
-                # Se todos votaram, revela automaticamente
-                if room.all_voted():
-                    room.reveal_votes()
-                    print_info(f"Todos votaram na sala {room.id} - revelando votos")
-                
-                self.broadcast_room_status(room.id)
-            else:
+            room = self.registry.get(room_id)
+            if room is None:
                 send_message(client_socket, MSG_TYPES['ERROR'], {
-                    'message': 'Erro ao registrar voto!'
-                })
-    
-    def reveal_votes(self, client_socket: socket.socket):
-        """Revela todos os votos"""
-        with self.lock:
-            player = self.clients.get(client_socket)
-            if not player:
+                    'message': f'Sala {room_id} não encontrada!'
+                }, request_id)
                 return
             
-            room = self.find_player_room(player.id)
-            if not room:
-                return
+            player_id = str(uuid.uuid4())[:8]
+            player = Player(player_id, player_name, client_socket, secrets.token_urlsafe(16))
             
-            # Verifica se é o host
-            if player.id != room.host_id:
-                send_message(client_socket, MSG_TYPES['ERROR'], {
-                    'message': 'Apenas o host pode revelar os votos!'
-                })
-                return
+            # Associa já a conexão para que as próximas mensagens sigam para a sala
+            self.registry.attach(client_socket, player, room)
+            room.mailbox.submit(self._join_room, client_socket, player, room, request_id)
             
-            if room.reveal_votes():
-                self.broadcast_room_status(room.id)
-                print_info(f"Votos revelados na sala {room.id}")
-            else:
-                send_message(client_socket, MSG_TYPES['ERROR'], {
-                    'message': 'Nenhuma votação em andamento!'
-                })
+        except Exception as e:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': f'Erro ao entrar na sala: {e}'
+            }, request_id)
     
-    def reset_round(self, client_socket: socket.socket):
-        """Reseta a rodada atual"""
-        with self.lock:
-            player = self.clients.get(client_socket)
-            if not player:
-                return
-            
-            room = self.find_player_room(player.id)
-            if not room:
-                return
+    def _join_room(self, client_socket, player: Player, room: Room, request_id=None):
+        """Coloca o jogador na sala (dentro do ator)"""
+        if self.registry.is_open(room) and room.add_player(player):
+            send_message(client_socket, MSG_TYPES['SUCCESS'], {
+                'room_id': room.id,
+                'player_id': player.id,
+                'resume_token': self.session_token(room, player),
+                'message': f'Entrou na sala {room.id}!'
+            }, request_id)
             
-            # Verifica se é o host
-            if player.id != room.host_id:
-                send_message(client_socket, MSG_TYPES['ERROR'], {
-                    'message': 'Apenas o host pode resetar a rodada!'
-                })
-                return
+            # Os demais recebem já o delta pendente; quem entra, o snapshot
+            self.flush_room_changes(room, exclude=client_socket)
+            self.send_room_status(client_socket, room)
+            log.info('player_joined', room=room.id, player=player.id, name=player.name)
+            return
+        
+        if self.registry.lookup(client_socket)[1] is room:
+            self.registry.detach(client_socket)
+        if self.registry.is_open(room):
+            message = 'Erro ao entrar na sala!'
+        else:
+            # A sala esvaziou enquanto o pedido aguardava na fila
+            message = f'Sala {room.id} não encontrada!'
+        send_message(client_socket, MSG_TYPES['ERROR'], {'message': message}, request_id)
+    
+    @staticmethod
+    def session_token(room: Room, player: Player) -> str:
+        """Token de retomada entregue ao cliente: sala, jogador e segredo"""
+        return f"{room.id}.{player.id}.{player.resume_token}"
+    
+    def resume_session(self, client_socket, data: dict, request_id=None):
+        """Devolve ao cliente reconectado o lugar que ele tinha na sala"""
+        room_id, _, rest = str(data.get('token', '')).partition('.')
+        player_id, _, secret = rest.partition('.')
+        
+        owner = self.registry.shard_of(room_id)
+        if owner is not None and owner != self.registry.shard:
+            send_message(client_socket, MSG_TYPES['REDIRECT'], {
+                'room_id': room_id,
+                'port': shard_port(self.port, owner)
+            }, request_id)
+            return
+        
+        room = self.registry.get(room_id)
+        if room is None:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Sessão expirada!',
+                'resume_failed': True
+            }, request_id)
+            return
+        room.mailbox.submit(self._resume_session, client_socket, player_id, secret, room,
+                            data.get('version'), request_id)
+    
+    def _resume_session(self, client_socket, player_id: str, secret: str, room: Room, version, request_id=None):
+        """Reassocia o jogador à nova conexão (dentro do ator)"""
+        player = room.players.get(player_id)
+        if (not self.registry.is_open(room) or player is None or not player.resume_token
+                or not secrets.compare_digest(player.resume_token, secret)):
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Sessão expirada!',
+                'resume_failed': True
+            }, request_id)
+            return
+        
+        # Uma conexão antiga ainda aberta (meio-aberta) é substituída
+        previous = player.connection
+        player.connection = client_socket
+        player.disconnected_at = None
+        self.registry.attach(client_socket, player, room)
+        if previous is not None and previous is not client_socket:
+            self.registry.detach(previous)
+            previous.close()
+        
+        send_message(client_socket, MSG_TYPES['SUCCESS'], {
+            'room_id': room.id,
+            'player_id': player.id,
+            'resume_token': self.session_token(room, player),
+            'resumed': True,
+            'message': f'Reconectado à sala {room.id}!'
+        }, request_id)
+        # Um único snapshot cobre o que mudou durante a queda
+        if version != room.version:
+            self.send_room_status(client_socket, room)
+        log.info('session_resumed', room=room.id, player=player.id)
+    
+    def start_voting(self, client_socket: socket.socket, player: Player, room: Room, data: dict, request_id=None):
+        """Inicia uma rodada de votação"""
+        if player.id not in room.players:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Você não está em nenhuma sala!'
+            }, request_id)
+            return
+        
+        # Verifica se é o host
+        if player.id != room.host_id:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Apenas o host pode iniciar a votação!'
+            }, request_id)
+            return
+        
+        story = data.get('story', '')
+        if room.start_voting(story):
+            self.acknowledge(client_socket, room, request_id)
+            # Ação do host, uma por rodada: sai já, sem esperar a janela
+            self.flush_room_changes(room)
+            log.info('voting_started', room=room.id, player=player.id, story=story[:50])
+        else:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Votação já está em andamento!'
+            }, request_id)
+    
+    def submit_vote(self, client_socket: socket.socket, player: Player, room: Room, data: dict, request_id=None):
+        """Registra o voto de um jogador"""
+        if player.id not in room.players:
+            return
+        
+        vote = data.get('vote')
+        if room.submit_vote(player.id, vote):
+            # Sem versão: o voto já está confirmado e o delta segue na janela
+            send_message(client_socket, MSG_TYPES['SUCCESS'], {
+                'message': 'Voto registrado!'
+            }, request_id)
             
-            room.reset_round()
-            self.broadcast_room_status(room.id)
-            print_info(f"Rodada resetada na sala {room.id}")
+            # Se todos votaram, revela automaticamente (sem esperar a janela)
+            if room.all_voted():
+                room.reveal_votes()
+                log.info('votes_revealed', room=room.id, player=player.id, auto=True)
+                self.flush_room_changes(room)
+            else:
+                self.broadcast_room_changes(room)
+        else:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Erro ao registrar voto!'
+            }, request_id)
+    
+    def reveal_votes(self, client_socket: socket.socket, player: Player, room: Room, data: dict, request_id=None):
+        """Revela todos os votos"""
+        if player.id not in room.players:
+            return
+        
+        # Verifica se é o host
+        if player.id != room.host_id:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Apenas o host pode revelar os votos!'
+            }, request_id)
+            return
+        
+        if room.reveal_votes():
+            self.acknowledge(client_socket, room, request_id)
+            self.flush_room_changes(room)
+            log.info('votes_revealed', room=room.id, player=player.id, auto=False)
+        else:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Nenhuma votação em andamento!'
+            }, request_id)
+    
+    def reset_round(self, client_socket: socket.socket, player: Player, room: Room, data: dict, request_id=None):
+        """Reseta a rodada atual"""
+        if player.id not in room.players:
+            return
+        
+        # Verifica se é o host
+        if player.id != room.host_id:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Apenas o host pode resetar a rodada!'
+            }, request_id)
+            return
+        
+        room.reset_round()
+        self.acknowledge(client_socket, room, request_id)
+        self.flush_room_changes(room)
+        log.info('round_reset', room=room.id, player=player.id)
+    
+    def load_backlog(self, client_socket, player: Player, room: Room, data: dict, request_id=None):
+        """Recebe um pedaço do backlog de histórias
+
+        O cliente lê o arquivo e o envia em pedaços pequenos, cada um tratado
+        no ator da sala como qualquer outra mensagem: um backlog grande não
+        segura o event loop nem as outras salas, e votos intercalam entre os
+        pedaços. Os deltas dos pedaços saem juntos na janela de coalescência.
+        """
+        if player.id not in room.players:
+            return
+        
+        if player.id != room.host_id:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Apenas o host pode carregar o backlog!'
+            }, request_id)
+            return
+        
+        stories = data.get('stories')
+        if not isinstance(stories, list):
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Backlog inválido!'
+            }, request_id)
+            return
+        
+        accepted = room.load_backlog(stories, bool(data.get('replace')))
+        if request_id is not None:
+            send_message(client_socket, MSG_TYPES['SUCCESS'], {
+                'version': room.version,
+                'accepted': accepted,
+                'backlog': len(room.backlog)
+            }, request_id)
+        self.broadcast_room_changes(room)
+        log.info('backlog_loaded', room=room.id, player=player.id, stories=accepted, queued=len(room.backlog))
+    
+    def next_story(self, client_socket, player: Player, room: Room, data: dict, request_id=None):
+        """Encerra a rodada e abre a votação da próxima história da fila (uma ida e volta)"""
+        if player.id not in room.players:
+            return
+        
+        if player.id != room.host_id:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Apenas o host pode avançar a fila!'
+            }, request_id)
+            return
+        
+        story = room.next_story()
+        if story is None:
+            send_message(client_socket, MSG_TYPES['ERROR'], {
+                'message': 'Não há histórias na fila!'
+            }, request_id)
+            return
+        
+        self.acknowledge(client_socket, room, request_id)
+        self.flush_room_changes(room)
+        log.info('voting_started', room=room.id, player=player.id, story=story[:50], queued=len(room.backlog))
+    
+    def get_room_status(self, client_socket, player: Player, room: Room, data: dict, request_id=None):
+        """Envia o snapshot completo (cliente detectou lacuna de versão)"""
+        if player.id in room.players:
+            self.send_room_status(client_socket, room)
+    
+    def leave_room(self, client_socket, player: Player, room: Room, data: dict, request_id=None):
+        """Saída voluntária: libera o lugar na hora, sem período de retomada"""
+        self.registry.detach(client_socket)
+        if player.connection is client_socket:
+            player.connection = None
+            self._remove_player(player, room)
+        self.acknowledge(client_socket, room, request_id)
     
-    def broadcast_room_status(self, room_id: str):
-        """Envia status da sala para todos os jogadores"""
-        if room_id not in self.rooms:
+    def acknowledge(self, client_socket, room: Room, request_id=None):
+        """Confirma uma ação a quem a pediu, com a versão da sala que a inclui
+
+        Só responde a requisições com id: clientes antigos não esperam
+        confirmação, e o cliente novo espera o estado chegar a essa versão
+        (o delta pode sair depois, na janela de coalescência).
+        """
+        if request_id is not None:
+            send_message(client_socket, MSG_TYPES['SUCCESS'], {'version': room.version}, request_id)
+    
+    def send_room_status(self, client_socket, room: Room):
+        """Envia o snapshot da sala para um jogador (bytes compartilhados pelo cache da sala)"""
+        client_socket.sendall(room.encoded_status(client_socket.codec), coalesce=MSG_TYPES['ROOM_STATUS'])
+        metrics.MESSAGES_OUT.inc(1, MSG_TYPES['ROOM_STATUS'])
+    
+    def broadcast_room_changes(self, room: Room):
+        """Agenda o envio das mutações pendentes ao fim da janela de coalescência"""
+        if not self.coalesce_window:
+            self.flush_room_changes(room)
+            return
+        if not room.flush_scheduled:
+            room.flush_scheduled = True
+            self.call_later(self.coalesce_window, room.mailbox.submit, self.flush_room_changes, room)
+    
+    def flush_room_changes(self, room: Room, exclude=None):
+        """Envia as mutações pendentes da sala como um delta versionado"""
+        room.flush_scheduled = False
+        base_version, events = room.take_events()
+        if not events:
             return
         
-        room = self.rooms[room_id]
-        status = room.get_status()
+        delta = {
+            'room_id': room.id,
+            'base_version': base_version,
+            'version': room.version,
+            'events': events
+        }
+        frames = {}  # Codec -> quadro, codificado uma vez por codec em uso
+        sent = 0
         
-        # Envia para todos os jogadores da sala
+        # Só enfileira: cada conexão tem sua própria escritora
         for player in room.players.values():
-            if player.connection:
-                try:
-                    send_message(player.connection, MSG_TYPES['ROOM_STATUS'], status)
-                except:
-                    pass
+            connection = player.connection
+            if not connection or connection is exclude:
+                continue
+            if connection.backlogged:
+                # Cliente atrasado: um snapshot substitui o anterior ainda na fila
+                self.send_room_status(connection, room)
+            else:
+                frame = frames.get(connection.codec)
+                if frame is None:
+                    frame = frames[connection.codec] = encode_message(
+                        MSG_TYPES['ROOM_DELTA'], delta, connection.codec)
+                connection.sendall(frame)
+                sent += 1
+        
+        metrics.MESSAGES_OUT.inc(sent, MSG_TYPES['ROOM_DELTA'])
+        metrics.BROADCAST_FANOUT.observe(len(room.players))
     
     def disconnect_client(self, client_socket: socket.socket):
         """Remove cliente desconectado"""
-        with self.lock:
-            if client_socket not in self.clients:
-                return
-            
-            player = self.clients[client_socket]
-            room = self.find_player_room(player.id)
-            
-            if room:
-                room.remove_player(player.id)
-                print_info(f"{player.name} saiu da sala {room.id}")
-                
-                # Remove sala vazia
-                if not room.players:
-                    del self.rooms[room.id]
-                    print_info(f"Sala {room.id} removida (vazia)")
-                else:
-                    self.broadcast_room_status(room.id)
-            
-            del self.clients[client_socket]
+        if self.stopping:
+            # Encerrando: o lugar não é liberado (o journal já foi fechado)
+            client_socket.close()
+            return
+        player, room = self.registry.detach(client_socket)
+        if room is None:
             client_socket.close()
+            return
+        room.mailbox.submit(self._leave_room, client_socket, player, room)
+    
+    def _leave_room(self, client_socket, player: Player, room: Room):
+        """Trata a queda da conexão de um jogador (dentro do ator)"""
+        # Só a conexão atual do jogador conta (não uma já substituída pela retomada)
+        if player.connection is client_socket and player.id in room.players:
+            if self.resume_grace:
+                self.hold_seat(player, room)
+                log.info('player_disconnected', room=room.id, player=player.id)
+            else:
+                self._remove_player(player, room)
+        
+        client_socket.close()
+    
+    def hold_seat(self, player: Player, room: Room):
+        """Reserva o lugar (voto e host incluídos) até o fim do período de retomada"""
+        player.connection = None
+        player.disconnected_at = stamp = time.monotonic()
+        self.call_later(self.resume_grace, room.mailbox.submit, self._expire_seat, player, room, stamp)
+    
+    def _expire_seat(self, player: Player, room: Room, stamp: float):
+        """Remove o jogador que não voltou a tempo (dentro do ator)"""
+        # Uma retomada (e talvez nova queda) depois do agendamento muda o carimbo
+        if player.disconnected_at == stamp and room.players.get(player.id) is player:
+            log.info('session_expired', room=room.id, player=player.id)
+            self._remove_player(player, room)
+    
+    def _remove_player(self, player: Player, room: Room):
+        """Tira o jogador da sala e remove a sala se ela esvaziar (dentro do ator)"""
+        if room.remove_player(player.id):
+            log.info('player_left', room=room.id, player=player.id)
+            
+            # Remove sala vazia
+            if not room.players:
+                self.registry.remove_room(room)
+                log.info('room_removed', room=room.id)
+            else:
+                self.broadcast_room_changes(room)
+    
+    def restore_rooms(self):
+        """Recupera as salas do journal antes de aceitar conexões"""
+        started = time.perf_counter()
+        count = self.registry.restore(self.new_mailbox)
+        elapsed = time.perf_counter() - started
+        # Os jogadores voltam desconectados: cada um tem o período de retomada
+        if self.resume_grace:
+            for room in self.registry.all_rooms():
+                for player in room.players.values():
+                    self.hold_seat(player, room)
+        else:
+            # Sem período de retomada ninguém volta ao lugar: os assentos caem
+            # agora (e as salas com eles), antes de aceitar conexões
+            for room in self.registry.all_rooms():
+                for player in list(room.players.values()):
+                    self._remove_player(player, room)
+            count = len(self.registry.rooms)
+        log.info('rooms_restored', rooms=count, duration_ms=round(elapsed * 1000, 1))
+        if count:
+            print_info(f"{count} salas recuperadas do journal em {elapsed * 1000:.0f} ms")
+    
+    def start_snapshots(self):
+        """Grava snapshots do journal periodicamente (thread própria: espera os atores)"""
+        def loop():
+            while self.running:
+                time.sleep(SNAPSHOT_INTERVAL)
+                if self.running:
+                    self.snapshot_rooms()
+        threading.Thread(target=loop, name='snapshot', daemon=True).start()
+    
+    def snapshot_rooms(self) -> bool:
+        """Grava um snapshot de todas as salas e descarta o log que ele cobre
+
+        O segmento do log é trocado antes da captura; cada sala é capturada
+        dentro do seu ator com o seq da sua última operação, então a
+        recuperação reaplica só o que veio depois de cada captura.
+        """
+        started = time.perf_counter()
+        segment = self.journal.rotate()
+        captures = []
+        for room in self.registry.all_rooms():
+            future = Future()
+            room.mailbox.submit(self._capture_room, room, future)
+            captures.append(future)
+        done, pending = wait(captures, timeout=SNAPSHOT_TIMEOUT)
+        if pending:
+            # Sem todas as salas o log antigo ainda é necessário
+            log.warning('snapshot_timeout', rooms=len(captures), pending=len(pending))
+            return False
+        states = [future.result() for future in done]
+        self.journal.write_snapshot({'rooms': [state for state in states if state]}, segment)
+        log.info('snapshot_written', rooms=len(states),
+                 duration_ms=round((time.perf_counter() - started) * 1000, 1))
+        return True
     
-    def find_player_room(self, player_id: str) -> Optional[Room]:
-        """Encontra a sala de um jogador"""
-        for room in self.rooms.values():
-            if player_id in room.players:
-                return room
-        return None
-    
-    def generate_room_id(self) -> str:
-        """Gera ID único para sala"""
-        import random
-        import string
-        while True:
-            room_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-            if room_id not in self.rooms:
-                return room_id
+    def _capture_room(self, room: Room, future: Future):
+        """Estado da sala para o snapshot (dentro do ator)"""
+        future.set_result(room.to_snapshot() if self.registry.is_open(room) else None)
+    
+    def metric_gauges(self) -> dict:
+        """Valores instantâneos lidos no scrape (len() é O(1), sem varrer salas)"""
+        return {
+            'planning_poker_rooms': ('Salas ativas', lambda: len(self.registry.rooms)),
+            'planning_poker_connections': ('Conexões abertas', lambda: len(self.open_connections)),
+        }
+    
+    def start_metrics(self):
+        """Expõe as métricas em http://127.0.0.1:<metrics_port>/metrics"""
+        self.metrics_server = metrics.serve('127.0.0.1', self.metrics_port, self.metric_gauges())
+        print_info(f"Métricas em http://127.0.0.1:{self.metrics_port}/metrics")
     
     def print_status(self):
         """Imprime status do servidor periodicamente"""
-        import time
         while self.running:
-            time.sleep(30)  # A cada 30 segundos
-            with self.lock:
-                print(f"\n[STATUS] Salas ativas: {len(self.rooms)} | Jogadores online: {len(self.clients)}")
-                for room_id, room in self.rooms.items():
-                    print(f"  Sala {room_id}: {len(room.players)} jogadores")
+            time.sleep(STATUS_INTERVAL)
+            self.report_status()
+    
+    def report_status(self):
+        """Registra um resumo a partir dos contadores"""
+        log.info('status', rooms=len(self.registry.rooms), players=len(self.registry.clients),
+                 messages_in=metrics.total(metrics.MESSAGES_IN),
+                 messages_out=metrics.total(metrics.MESSAGES_OUT))
     
     def stop(self):
         """Para o servidor"""
         print_info("\nEncerrando servidor...")
+        self.stopping = True
         self.running = False
         
-        with self.lock:
-            # Desconecta todos os clientes
-            for client in list(self.clients.keys()):
-                client.close()
-            
-            if self.server_socket:
-                self.server_socket.close()
+        # Fecha o journal antes de desconectar: as salas devem voltar no reinício
+        if self.journal:
+            self.journal.close()
+        
+        # Desconecta todos os clientes
+        for client in self.registry.connections():
+            client.close()
+        
+        if self.server_socket:
+            self.server_socket.close()
+        if self.shard_socket:
+            self.shard_socket.close()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+        self.pool.shutdown(wait=False)
+        self.timers.stop()
         
         print_success("Servidor encerrado.")
 
@@ -388,18 +855,80 @@ def main():
     """Função principal do servidor"""
     import sys
     
-    # Permite especificar porta via linha de comando
+    # Permite especificar porta e opções (--nome=valor) via linha de comando
     port = DEFAULT_PORT
-    if len(sys.argv) > 1:
-        try:
-            port = int(sys.argv[1])
-        except ValueError:
-            print_error(f"Porta inválida: {sys.argv[1]}")
-            sys.exit(1)
+    options = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith('--'):
+            name, _, value = arg[2:].partition('=')
+            options[name] = value
+        else:
+            try:
+                port = int(arg)
+            except ValueError:
+                print_error(f"Porta inválida: {arg}")
+                sys.exit(1)
     
-    server = PlanningPokerServer(port=port)
-    server.start()
-
+    engine = 'asyncio' if options.pop('async', None) is not None else options.pop('engine', 'threads')
+    kwargs = {'port': port}
+    try:
+        if 'coalesce-ms' in options:
+            kwargs['coalesce_window'] = float(options.pop('coalesce-ms')) / 1000
+        if 'metrics-port' in options:
+            kwargs['metrics_port'] = int(options.pop('metrics-port'))
+        log_level = options.pop('log-level', 'INFO')
+        log_sample = float(options.pop('log-sample', 1.0))
+        log_file = options.pop('log-file', None)
+        journal_dir = options.pop('journal', None)
+        if 'heartbeat' in options:
+            kwargs['heartbeat_interval'] = float(options.pop('heartbeat'))
+        if 'idle-timeout' in options:
+            kwargs['idle_timeout'] = float(options.pop('idle-timeout'))
+        if 'resume-grace' in options:
+            kwargs['resume_grace'] = float(options.pop('resume-grace'))
+        workers = int(options.pop('workers', 1))
+        if 'shard' in options:
+            # Processo filho do supervisor: --shard=<índice>/<total>
+            shard, _, shard_count = options.pop('shard').partition('/')
+            kwargs['shard'], kwargs['shard_count'] = int(shard), int(shard_count)
+            if 'metrics_port' in kwargs:
+                kwargs['metrics_port'] += kwargs['shard']
+            if log_file:
+                log_file = f"{log_file}.{kwargs['shard']}"
+            if journal_dir:
+                journal_dir = f"{journal_dir}.{kwargs['shard']}"
+        if journal_dir:
+            kwargs['journal_dir'] = journal_dir
+    except ValueError as e:
+        print_error(f"Opção inválida: {e}")
+        sys.exit(1)
+    if options:
+        print_error(f"Opção desconhecida: --{next(iter(options))}")
+        sys.exit(1)
+    
+    if workers > 1:
+        from src.supervisor import run_supervisor
+        run_supervisor(port, workers, [arg for arg in sys.argv[1:] if not arg.startswith('--workers')])
+        return
+    
+    if engine == 'asyncio':
+        from src.async_server import AsyncPlanningPokerServer
+        server = AsyncPlanningPokerServer(**kwargs)
+    elif engine == 'threads':
+        server = PlanningPokerServer(**kwargs)
+    else:
+        print_error(f"Motor inválido: {engine} (use 'threads' ou 'asyncio')")
+        sys.exit(1)
+    
+    try:
+        listener = log.setup(log_level, log_sample, log_file)
+    except (ValueError, OSError) as e:
+        print_error(f"Opção de log inválida: {e}")
+        sys.exit(1)
+    try:
+        server.start()
+    finally:
+        listener.stop()  # Escreve o que ainda estava na fila
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+Supervisor do modo com vários processos
+Sobe um processo de servidor por shard, todos escutando a mesma porta com
+SO_REUSEPORT; o kernel distribui as conexões e cada processo é dono das
+salas cujo ID começa com o seu caractere
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from src.utils.display import print_header, print_success, print_error, print_info
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Intervalo (segundos) entre as verificações dos processos filhos
+POLL_INTERVAL = 1.0
+
+# Um processo que morre antes disso não é reiniciado (ex.: porta ocupada)
+MIN_UPTIME = 5.0
+
+
+def start_worker(shard: int, workers: int, args: List[str]) -> subprocess.Popen:
+    """Inicia o processo de um shard com as mesmas opções do supervisor"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(ROOT), env.get('PYTHONPATH')]))
+    return subprocess.Popen(
+        [sys.executable, '-c', 'from src.server import main; main()', *args, f'--shard={shard}/{workers}'],
+        env=env
+    )
+
+
+def run_supervisor(port: int, workers: int, args: List[str]):
+    """Mantém `workers` processos rodando até Ctrl+C ou SIGTERM"""
+    print_header("PLANNING POKER - SERVIDOR")
+    print_success(f"Supervisor com {workers} processos na porta {port} "
+                  f"(portas próprias {port + 1}-{port + workers})")
+    print_info("Pressione Ctrl+C para parar o servidor\n")
+
+    # SIGTERM encerra como Ctrl+C, derrubando os filhos junto
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    processes = [start_worker(shard, workers, args) for shard in range(workers)]
+    started = [time.monotonic()] * workers
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            for shard, process in enumerate(processes):
+                if process.poll() is None:
+                    continue
+                if time.monotonic() - started[shard] < MIN_UPTIME:
+                    print_error(f"Processo {shard + 1} falhou ao iniciar (código {process.returncode})")
+                    return
+                # Volta a atender o shard (as salas voltam do journal, se houver)
+                print_error(f"Processo {shard + 1} terminou (código {process.returncode}); reiniciando")
+                processes[shard] = start_worker(shard, workers, args)
+                started[shard] = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            process.wait()
+        print_success("Servidor encerrado.")
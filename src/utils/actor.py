@@ -0,0 +1,61 @@
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+
+class SerialExecutor:
+    """Caixa de correio de um ator: executa tarefas uma por vez, em ordem de chegada
+
+    Não possui thread própria. Quando recebe trabalho estando ocioso, agenda
+    um `_drain` no executor compartilhado (pool de threads ou event loop),
+    então milhares de salas ociosas não custam thread nenhuma e salas
+    diferentes avançam em paralelo.
+    """
+
+    # Tarefas executadas antes de devolver o trabalhador a outras salas.
+    # Uma por vez: uma sala com clientes lentos não monopoliza o trabalhador.
+    BATCH_SIZE = 1
+
+    def __init__(self, spawn: Callable[[Callable[[], None]], bool],
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self._spawn = spawn
+        self._on_error = on_error
+        self._mailbox = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+    def submit(self, fn: Callable, *args):
+        """Coloca uma tarefa na caixa de correio"""
+        with self._lock:
+            self._mailbox.append((fn, args))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._schedule()
+
+    def _schedule(self):
+        """Agenda um `_drain` no executor compartilhado"""
+        if not self._spawn(self._drain):
+            # Recusado (servidor encerrando): a caixa volta a aceitar agendamento
+            with self._lock:
+                self._scheduled = False
+
+    def _drain(self):
+        """Executa um lote de tarefas pendentes"""
+        for _ in range(self.BATCH_SIZE):
+            with self._lock:
+                if not self._mailbox:
+                    self._scheduled = False
+                    return
+                fn, args = self._mailbox.popleft()
+            try:
+                fn(*args)
+            except Exception as e:
+                if self._on_error:
+                    self._on_error(e)
+        # Ainda há trabalho: volta para o fim da fila do executor compartilhado
+        self._schedule()
+
+    def __len__(self):
+        """Tarefas aguardando execução"""
+        return len(self._mailbox)
@@ -0,0 +1,62 @@
+"""
+Leitura do backlog de histórias (CSV ou JSON) enviado com LOAD_BACKLOG
+
+O arquivo é lido no cliente e segue para o servidor em pedaços de
+BACKLOG_CHUNK histórias, cada um numa mensagem.
+"""
+
+import csv
+import json
+from typing import Iterator, List, Optional
+
+BACKLOG_CHUNK = 50  # Histórias por mensagem LOAD_BACKLOG
+
+# Colunas (CSV) ou campos (JSON) aceitos como título, em ordem de preferência
+TITLE_FIELDS = ('story', 'title', 'summary', 'name', 'história', 'historia', 'título', 'titulo')
+
+
+def read_backlog(path: str) -> List[str]:
+    """Títulos das histórias de um arquivo .json (lista) ou .csv (coluna de título ou a primeira)
+
+    OSError se o arquivo não abrir, ValueError se não for CSV/JSON válido.
+    """
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('stories', [])
+        if not isinstance(data, list):
+            raise ValueError('esperada uma lista de histórias')
+        return [title for title in map(_title, data) if title]
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        try:
+            rows = [row for row in csv.reader(f) if row]
+        except csv.Error as e:
+            raise ValueError(e) from e
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = next((header.index(field) for field in TITLE_FIELDS if field in header), None)
+    if column is None:
+        column = 0  # Sem cabeçalho reconhecido: a primeira coluna de todas as linhas
+    else:
+        rows = rows[1:]
+    return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+
+
+def _title(item) -> Optional[str]:
+    """Título de um item do JSON: a própria string ou o primeiro campo de título"""
+    if isinstance(item, str):
+        return item.strip()
+    if isinstance(item, dict):
+        for field in TITLE_FIELDS:
+            if isinstance(item.get(field), str):
+                return item[field].strip()
+    return None
+
+
+def chunks(stories: List[str], size: int = BACKLOG_CHUNK) -> Iterator[List[str]]:
+    """Pedaços da lista, um por mensagem"""
+    for start in range(0, len(stories), size):
+        yield stories[start:start + size]
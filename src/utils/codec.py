@@ -0,0 +1,204 @@
+import struct
+
+from src.utils.network import MSG_TYPES, create_message, parse_message
+
+# Codec binário compacto, negociado por conexão na mensagem HELLO.
+#
+# Payload: cabeçalho (versão do formato, tipo da mensagem) seguido dos dados
+# codificados com tags de 1 byte. Tipos de mensagem viram inteiros pequenos
+# e strings curtas são internadas por mensagem: a primeira ocorrência vai
+# por extenso, as seguintes (IDs de jogadores, votos) são referências. Cada
+# mensagem é autocontida, então o mesmo quadro serve a todos os destinatários.
+# O id da requisição, quando há, é um valor opcional depois dos dados (quem
+# não o conhece para de ler antes).
+HEADER = struct.Struct('>BB')
+BINARY_VERSION = 1  # Nunca é o primeiro byte de um JSON ('{')
+
+# Novos tipos de mensagem devem entrar sempre no fim de MSG_TYPES
+TYPE_IDS = {msg_type: i for i, msg_type in enumerate(MSG_TYPES.values(), 1)}
+TYPE_NAMES = {i: msg_type for msg_type, i in TYPE_IDS.items()}
+
+# Strings já conhecidas pelos dois lados (chaves e nomes de eventos)
+STATIC_STRINGS = (
+    'id', 'name', 'has_voted', 'vote', 'is_host', 'room_id', 'host_id',
+    'is_voting', 'votes_revealed', 'current_story', 'players', 'all_voted',
+    'version', 'base_version', 'events', 'event', 'player', 'player_id',
+    'votes', 'story', 'message', 'player_joined', 'player_left',
+    'voting_started', 'player_voted', 'round_reset',
+)
+MAX_INTERNED = 64  # Strings maiores (mensagens, histórias) não são internadas
+
+_NONE, _FALSE, _TRUE, _INT, _STR, _REF, _LIST, _DICT, _FLOAT = range(9)
+_FLOAT_STRUCT = struct.Struct('>d')
+
+
+class JsonCodec:
+    """Codec padrão: JSON em UTF-8 (clientes antigos)"""
+
+    name = 'json'
+
+    def encode(self, msg_type: str, data=None, request_id=None) -> bytes:
+        """Payload de uma mensagem"""
+        return create_message(msg_type, data, request_id).encode('utf-8')
+
+    def decode(self, payload):
+        """Mensagem decodificada (None se inválida)"""
+        return parse_message(payload)
+
+
+class BinaryCodec:
+    """Codec binário compacto (ver comentário no topo do módulo)"""
+
+    name = 'binary'
+
+    def encode(self, msg_type: str, data=None, request_id=None) -> bytes:
+        """Payload de uma mensagem"""
+        out = bytearray(HEADER.pack(BINARY_VERSION, TYPE_IDS[msg_type]))
+        table = {s: i for i, s in enumerate(STATIC_STRINGS)}
+        _write_value(out, data or {}, table)
+        if request_id is not None:
+            _write_value(out, request_id, table)
+        return bytes(out)
+
+    def decode(self, payload):
+        """Mensagem decodificada (None se inválida)"""
+        try:
+            version, type_id = HEADER.unpack_from(payload)
+            if version != BINARY_VERSION:
+                return None
+            table = list(STATIC_STRINGS)
+            # Indexar bytes é mais rápido que indexar memoryview
+            raw = bytes(payload)
+            data, offset = _read_value(raw, HEADER.size, table)
+            message = {'type': TYPE_NAMES[type_id], 'data': data}
+            if offset < len(raw):
+                message['id'], _ = _read_value(raw, offset, table)
+            return message
+        except (struct.error, KeyError, IndexError, TypeError, ValueError, UnicodeDecodeError):
+            return None
+
+
+JSON = JsonCodec()
+BINARY = BinaryCodec()
+CODECS = {codec.name: codec for codec in (BINARY, JSON)}
+
+
+def negotiate(offered) -> JsonCodec:
+    """Primeiro codec oferecido pelo cliente que o servidor conhece (JSON se nenhum)"""
+    for name in offered or ():
+        if name in CODECS:
+            return CODECS[name]
+    return JSON
+
+
+def decode_message(payload):
+    """Decodifica um payload em qualquer codec, pelo primeiro byte"""
+    if len(payload) and payload[0] == BINARY_VERSION:
+        return BINARY.decode(payload)
+    return parse_message(payload)
+
+
+def _write_uint(out: bytearray, n: int):
+    """Inteiro não negativo em varint (7 bits por byte)"""
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _write_value(out: bytearray, value, table: dict):
+    """Codifica um valor JSON-compatível"""
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, str):
+        index = table.get(value)
+        if index is not None:
+            out.append(_REF)
+            _write_uint(out, index)
+            return
+        raw = value.encode('utf-8')
+        out.append(_STR)
+        _write_uint(out, len(raw))
+        out += raw
+        if len(raw) <= MAX_INTERNED:
+            table[value] = len(table)
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        _write_uint(out, len(value))
+        for key, item in value.items():
+            _write_value(out, key, table)
+            _write_value(out, item, table)
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _write_uint(out, len(value))
+        for item in value:
+            _write_value(out, item, table)
+    elif isinstance(value, int):
+        out.append(_INT)
+        _write_uint(out, value << 1 if value >= 0 else (-value << 1) - 1)  # zigzag
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += _FLOAT_STRUCT.pack(value)
+    else:
+        raise TypeError(f"Tipo não suportado pelo codec binário: {type(value).__name__}")
+
+
+def _read_uint(view: bytes, offset: int):
+    """Lê um varint; devolve (valor, novo offset)"""
+    byte = view[offset]
+    if byte < 0x80:
+        return byte, offset + 1  # Caso comum: um byte
+    result = 0
+    shift = 0
+    while True:
+        byte = view[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def _read_value(view: bytes, offset: int, table: list):
+    """Decodifica um valor; devolve (valor, novo offset)"""
+    tag = view[offset]
+    offset += 1
+    if tag == _REF:
+        index, offset = _read_uint(view, offset)
+        return table[index], offset
+    if tag == _STR:
+        size, offset = _read_uint(view, offset)
+        value = view[offset:offset + size].decode('utf-8')
+        if size <= MAX_INTERNED:
+            table.append(value)
+        return value, offset + size
+    if tag == _DICT:
+        count, offset = _read_uint(view, offset)
+        result = {}
+        for _ in range(count):
+            key, offset = _read_value(view, offset, table)
+            result[key], offset = _read_value(view, offset, table)
+        return result, offset
+    if tag == _LIST:
+        count, offset = _read_uint(view, offset)
+        result = []
+        for _ in range(count):
+            item, offset = _read_value(view, offset, table)
+            result.append(item)
+        return result, offset
+    if tag == _NONE:
+        return None, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _INT:
+        n, offset = _read_uint(view, offset)
+        return (n >> 1) if not n & 1 else -((n + 1) >> 1), offset
+    if tag == _FLOAT:
+        return _FLOAT_STRUCT.unpack_from(view, offset)[0], offset + _FLOAT_STRUCT.size
+    raise ValueError(f"Tag desconhecida: {tag}")
@@ -0,0 +1,157 @@
+import socket
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from src.utils import metrics
+from src.utils.network import OUTBOUND_HIGH_WATER
+
+
+class OutboundQueue:
+    """Fila de saída de uma conexão
+
+    Quadros com a mesma chave de coalescência (ex.: ROOM_STATUS) substituem
+    o anterior ainda não enviado, que já está obsoleto. Se mesmo assim os
+    bytes pendentes passam de `high_water`, o cliente é lento demais e
+    put() devolve False para que a conexão seja encerrada.
+    """
+
+    def __init__(self, high_water: int = OUTBOUND_HIGH_WATER):
+        self.high_water = high_water
+        self._frames = deque()      # Entradas [chave, bytes]; bytes None = descartado
+        self._coalescing = {}       # chave -> entrada pendente
+        self._bytes = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, data: bytes, coalesce: Optional[str] = None) -> bool:
+        """Enfileira um quadro; False se o limite de bytes pendentes estourou"""
+        with self._cond:
+            if self._closed:
+                return False
+            if coalesce is not None:
+                stale = self._coalescing.get(coalesce)
+                if stale is not None:
+                    self._bytes -= len(stale[1])
+                    stale[1] = None
+            entry = [coalesce, data]
+            self._frames.append(entry)
+            if coalesce is not None:
+                self._coalescing[coalesce] = entry
+            self._bytes += len(data)
+            if self._bytes > self.high_water:
+                return False
+            self._cond.notify()
+            return True
+
+    def get(self, block: bool = True) -> Optional[bytes]:
+        """Próximo quadro a enviar (None se a fila foi fechada ou está vazia)"""
+        with self._cond:
+            while True:
+                while self._frames:
+                    entry = self._frames.popleft()
+                    key, data = entry
+                    if data is None:
+                        continue
+                    if key is not None and self._coalescing.get(key) is entry:
+                        del self._coalescing[key]
+                    self._bytes -= len(data)
+                    return data
+                if self._closed or not block:
+                    return None
+                self._cond.wait()
+
+    def close(self):
+        """Descarta o pendente e acorda quem espera em get()"""
+        with self._cond:
+            self._closed = True
+            self._frames.clear()
+            self._coalescing.clear()
+            self._bytes = 0
+            self._cond.notify_all()
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes aguardando envio"""
+        return self._bytes
+    
+    @property
+    def backlogged(self) -> bool:
+        """Cliente atrasado: melhor mandar um snapshot coalescível que mais deltas"""
+        return self._bytes > self.high_water // 4
+
+    def __len__(self):
+        """Quadros aguardando envio (incluindo os descartados ainda na fila)"""
+        return len(self._frames)
+
+
+class SocketConnection:
+    """Conexão TCP do motor com threads, com fila de saída e thread escritora
+
+    Quem envia só enfileira e nunca bloqueia; a thread escritora (criada no
+    primeiro envio) esvazia a fila com sendall.
+    """
+
+    def __init__(self, sock: socket.socket, address=None, high_water: int = OUTBOUND_HIGH_WATER):
+        self.sock = sock
+        self.address = address
+        self.outbound = OutboundQueue(high_water)
+        self.codec = None  # Negociado no HELLO (None = JSON)
+        self.closed = False
+        self.last_seen = time.monotonic()  # Último dado recebido (heartbeat)
+        self._writer = None
+        self._lock = threading.Lock()
+
+    @property
+    def backlogged(self) -> bool:
+        """A fila de saída está acumulando"""
+        return self.outbound.backlogged
+
+    def recv(self, size: int) -> bytes:
+        """Lê do socket (thread leitora)"""
+        data = self.sock.recv(size)
+        self.last_seen = time.monotonic()
+        return data
+
+    def sendall(self, data: bytes, coalesce: Optional[str] = None):
+        """Enfileira o quadro para envio (não bloqueia)"""
+        if self.closed:
+            return
+        if not self.outbound.put(data, coalesce):
+            # Cliente lento demais: desconecta em vez de segurar o remetente
+            metrics.SLOW_CLIENTS.inc()
+            self.close()
+            return
+        metrics.OUTBOUND_QUEUE_BYTES.observe(self.outbound.pending_bytes)
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self):
+        """Esvazia a fila de saída"""
+        while True:
+            data = self.outbound.get()
+            if data is None:
+                return
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                self.close()
+                return
+            metrics.BYTES_SENT.inc(len(data))
+
+    def close(self):
+        """Fecha a conexão (idempotente); acorda a thread leitora"""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.outbound.close()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
@@ -1,16 +1,108 @@
+import io
 import os
-import platform
-from colorama import init, Fore, Style, Back
+import re
+import sys
+from contextlib import contextmanager, redirect_stdout
+from colorama import Fore, Style, Back
 
-# Inicializa colorama para funcionar no Windows também
-init(autoreset=True)
+from src.models.deck import get_deck
+
+# Só o console do Windows precisa do colorama para traduzir os códigos ANSI;
+# nos demais terminais eles já funcionam e o init() só custaria tempo
+if os.name == 'nt':
+    from colorama import init
+    init(autoreset=True)
+
+# Sequências ANSI de controle do terminal
+CSI = '\x1b['
+RESET = CSI + '0m'
+CLEAR = CSI + 'H' + CSI + '2J'   # Cursor no topo e tela limpa
+CLEAR_LINE = CSI + 'K'           # Apaga do cursor ao fim da linha
+CLEAR_BELOW = CSI + 'J'          # Apaga do cursor ao fim da tela
+SGR = re.compile(r'\x1b\[[0-9;]*m')
+PROMPT_ROWS = 2  # Linhas que o menu usa abaixo do quadro (linha em branco e prompt)
+
+
+class Screen:
+    """Renderizador de quadros por diferença
+
+    Cada quadro é montado num buffer (o que for impresso dentro de frame())
+    e sai numa única escrita, reescrevendo com posicionamento de cursor só
+    as linhas que mudaram desde o quadro anterior. Impressões fora de um
+    quadro deixam a tela num estado desconhecido e forçam um quadro inteiro.
+    """
+
+    def __init__(self):
+        self._lines = None  # Linhas do último quadro (None = redesenhar tudo)
+        self._size = None
+
+    def invalidate(self):
+        """A tela foi alterada por fora: o próximo quadro sai inteiro"""
+        self._lines = None
+
+    def clear(self):
+        """Limpa a tela com ANSI, sem criar um processo de shell"""
+        self._write(CLEAR)
+        self._lines = None
+
+    @contextmanager
+    def frame(self):
+        """Captura as impressões do bloco e as desenha como um quadro"""
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            yield
+        self.render(buffer.getvalue())
+
+    def render(self, text: str):
+        """Desenha o quadro, reescrevendo só as linhas alteradas"""
+        import shutil  # Só quem desenha quadros precisa (fora do caminho de inicialização)
+        lines = self._split(text)
+        size = shutil.get_terminal_size()
+        # Quadro mais alto que a tela (com folga para o prompt abaixo dele)
+        # ou com linhas que quebram: a rolagem desalinha as linhas, então
+        # sai inteiro e não serve de base para o próximo
+        fits = len(lines) + PROMPT_ROWS < size.lines and all(
+            len(SGR.sub('', line)) < size.columns for line in lines)
+        previous = self._lines if fits and size == self._size else None
+
+        out = [CLEAR] if previous is None else []
+        for row, line in enumerate(lines, 1):
+            if previous is None or row > len(previous) or previous[row - 1] != line:
+                out.append(f"{CSI}{row};1H{RESET}{line}{CLEAR_LINE}")
+        out.append(f"{CSI}{len(lines) + 1};1H{RESET}{CLEAR_BELOW}")
+        if not fits:
+            out = [CLEAR, '\n'.join(lines), '\n']
+        self._write(''.join(out))
+        self._lines = lines if fits else None
+        self._size = size
+
+    @staticmethod
+    def _split(text: str):
+        """Linhas do quadro, cada uma com as cores herdadas das anteriores
+
+        Assim uma linha reescrita sozinha sai com a mesma cor que teria no
+        quadro inteiro (ex.: o título de print_header).
+        """
+        lines = []
+        state = ''
+        for line in text.rstrip('\n').split('\n'):
+            lines.append(state + line)
+            for code in SGR.findall(line):
+                state = '' if code in (RESET, CSI + 'm') else state + code
+        return lines
+
+    @staticmethod
+    def _write(data: str):
+        """Uma única escrita e um único flush por quadro"""
+        sys.stdout.write(data)
+        sys.stdout.flush()
+
+
+screen = Screen()
 
 def clear_screen():
     """Limpa a tela do terminal (cross-platform)"""
-    if platform.system() == 'Windows':
-        os.system('cls')
-    else:
-        os.system('clear')
+    screen.clear()
 
 def print_header(text):
     """Imprime um cabeçalho destacado"""
@@ -30,33 +122,53 @@ def print_info(text):
     """Imprime mensagem informativa"""
     print(f"{Fore.YELLOW}ℹ {text}{Style.RESET_ALL}")
 
-def print_cards():
-    """Exibe as cartas disponíveis com cores"""
-    cards = ['0', '1', '2', '3', '5', '8', '13', '21', '?', '☕']
+# Significado das cartas especiais, na ordem do baralho
+SPECIAL_MEANINGS = {
+    '?': '? = Incerteza/Necessita esclarecimento',
+    '☕': '☕ = Pausa para café necessária!',
+}
+
+# Texto de cada nível de consenso do resumo (Room.CONSENSUS_LEVELS/CONSENSUS_STEPS)
+CONSENSUS_TEXT = {
+    'total': f"{Fore.GREEN}{Style.BRIGHT}✓ Consenso TOTAL! Todos votaram igual!",
+    'close': f"{Fore.GREEN}✓ Consenso muito próximo!",
+    'fair': f"{Fore.YELLOW}~ Consenso razoável.",
+    'moderate': f"{Fore.YELLOW}⚠ Divergência moderada - considere discutir.",
+    'wide': f"{Fore.RED}⚠ Grande divergência! Recomenda-se mais discussão.",
+}
+
+# Cor de cada faixa do baralho (Deck.bands); as especiais têm a sua
+BAND_COLORS = {
+    'low': Fore.GREEN,
+    'mid': Fore.YELLOW,
+    'high': Fore.RED,
+    '?': Fore.MAGENTA,
+    '☕': Fore.CYAN,
+}
+
+def card_color(card, deck=None):
+    """Cor de uma carta: verde/amarelo/vermelho pelo tamanho, especiais à parte"""
+    return BAND_COLORS.get((deck or get_deck()).bands.get(card), Fore.WHITE)
+
+def print_cards(deck=None):
+    """Exibe as cartas do baralho com cores"""
+    deck = deck or get_deck()
+    width = max(2, max(len(card) for card in deck.cards))
+    cell = '─' * (width + 2)
     
     print(f"\n{Fore.CYAN}{Style.BRIGHT}Cartas disponíveis:{Style.RESET_ALL}")
-    print(f"{Fore.WHITE}┌────┬────┬────┬────┬────┬────┬────┬────┬────┬────┐")
+    print(f"{Fore.WHITE}┌{'┬'.join([cell] * len(deck.cards))}┐")
     print(f"{Fore.WHITE}│", end="")
     
-    for card in cards:
-        # Cores diferentes para tipos de cartas
-        if card == '?':
-            color = Fore.MAGENTA
-        elif card == '☕':
-            color = Fore.YELLOW
-        elif card in ['0', '1', '2', '3']:
-            color = Fore.GREEN
-        elif card in ['5', '8']:
-            color = Fore.YELLOW
-        else:  # 13, 21
-            color = Fore.RED
-        
-        print(f"{color} {card:^2} {Fore.WHITE}│", end="")
+    for card in deck.cards:
+        print(f"{card_color(card, deck)} {card:^{width}} {Fore.WHITE}│", end="")
     
-    print(f"\n{Fore.WHITE}└────┴────┴────┴────┴────┴────┴────┴────┴────┴────┘{Style.RESET_ALL}")
+    print(f"\n{Fore.WHITE}└{'┴'.join([cell] * len(deck.cards))}┘{Style.RESET_ALL}")
 
 def print_room_status(status):
     """Exibe o status da sala com cores e formatação"""
+    deck = get_deck(status.get('deck'))
+    
     # Cabeçalho da sala
     print(f"\n{Fore.CYAN}{Style.BRIGHT}╔{'═'*48}╗")
     print(f"║ Sala: {status['room_id']:^40} ║")
@@ -69,6 +181,11 @@ def print_room_status(status):
     else:
         print(f"{Fore.WHITE}📋 História: {Style.DIM}Nenhuma{Style.RESET_ALL}")
     
+    # Fila de histórias carregada pelo host
+    if status.get('backlog'):
+        print(f"{Fore.WHITE}📚 Fila: {Fore.CYAN}{status['backlog']}{Style.RESET_ALL} "
+              f"{Style.DIM}(próxima: {status.get('next_story')}){Style.RESET_ALL}")
+    
     # Status da votação
     if status['is_voting']:
         if status['votes_revealed']:
@@ -99,18 +216,7 @@ def print_room_status(status):
         
         # Mostra voto se revelado
         if status['votes_revealed'] and player['vote']:
-            # Cor do voto baseado no valor
-            if player['vote'] in ['0', '1', '2', '3']:
-                vote_color = Fore.GREEN
-            elif player['vote'] in ['5', '8']:
-                vote_color = Fore.YELLOW
-            elif player['vote'] in ['13', '21']:
-                vote_color = Fore.RED
-            elif player['vote'] == '?':
-                vote_color = Fore.MAGENTA
-            else:  # ☕
-                vote_color = Fore.CYAN
-            
+            vote_color = card_color(player['vote'], deck)
             print(f"  {vote_status} {name_display}{host_marker}: {vote_color}{Style.BRIGHT}[{player['vote']}]{Style.RESET_ALL}")
         else:
             print(f"  {vote_status} {name_display}{host_marker}")
@@ -131,44 +237,21 @@ def print_menu(title, options):
     print(f"  {Fore.RED}{Style.BRIGHT}0.{Style.RESET_ALL} {Fore.WHITE}Voltar/Sair{Style.RESET_ALL}")
     print()
 
-def print_votes_summary(votes):
-    """Exibe um resumo dos votos com gráfico colorido"""
-    if not votes:
+def print_votes_summary(summary, deck=None):
+    """Exibe o resumo dos votos calculado pelo servidor na revelação"""
+    if not summary or not summary['total']:
         print_info("Nenhum voto registrado ainda.")
         return
     
-    # Conta ocorrências de cada voto
-    vote_count = {}
-    for vote in votes:
-        if vote in vote_count:
-            vote_count[vote] += 1
-        else:
-            vote_count[vote] = 1
-    
     print(f"\n{Fore.CYAN}{Style.BRIGHT}📊 Resumo dos Votos:{Style.RESET_ALL}")
     print(f"{Fore.WHITE}{'─' * 35}{Style.RESET_ALL}")
     
-    # Ordena por valor do voto (exceto especiais)
-    sorted_votes = sorted(vote_count.items(), key=lambda x: (
-        x[0] not in ['?', '☕'],  # Especiais por último
-        float(x[0]) if x[0].isdigit() else float('inf')
-    ))
-    
-    # Encontra o máximo para escalar o gráfico
-    max_count = max(vote_count.values()) if vote_count else 1
-    
-    for vote, count in sorted_votes:
-        # Cor baseada no valor
-        if vote in ['0', '1', '2', '3']:
-            color = Fore.GREEN
-        elif vote in ['5', '8']:
-            color = Fore.YELLOW
-        elif vote in ['13', '21']:
-            color = Fore.RED
-        elif vote == '?':
-            color = Fore.MAGENTA
-        else:  # ☕
-            color = Fore.CYAN
+    # Contagens já vêm na ordem do baralho; o máximo escala o gráfico
+    counts = summary['counts']
+    max_count = max(count for _, count in counts)
+    
+    for vote, count in counts:
+        color = card_color(vote, deck)
         
         # Barra proporcional
         bar_length = int((count / max_count) * 20)
@@ -176,45 +259,28 @@ def print_votes_summary(votes):
         
         print(f"  {color}{vote:>3}{Style.RESET_ALL}: {color}{bar}{Style.RESET_ALL} {Fore.WHITE}({count}){Style.RESET_ALL}")
     
-    # Estatísticas
-    print(f"\n{Fore.CYAN}{Style.BRIGHT}📈 Estatísticas:{Style.RESET_ALL}")
-    print(f"{Fore.WHITE}{'─' * 35}{Style.RESET_ALL}")
-    
-    # Calcula métricas apenas para votos numéricos
-    numeric_votes = [int(v) for v in votes if v.isdigit()]
-    
-    if numeric_votes:
-        avg = sum(numeric_votes) / len(numeric_votes)
-        min_vote = min(numeric_votes)
-        max_vote = max(numeric_votes)
-        
-        print(f"  {Fore.WHITE}Média: {Fore.YELLOW}{avg:.1f}{Style.RESET_ALL}")
-        print(f"  {Fore.WHITE}Mínimo: {Fore.GREEN}{min_vote}{Style.RESET_ALL}")
-        print(f"  {Fore.WHITE}Máximo: {Fore.RED}{max_vote}{Style.RESET_ALL}")
-        print(f"  {Fore.WHITE}Amplitude: {Fore.MAGENTA}{max_vote - min_vote}{Style.RESET_ALL}")
+    # Estatísticas (só quando há votos fora as cartas especiais; média e
+    # amplitude só em baralhos numéricos)
+    if 'min' in summary:
+        print(f"\n{Fore.CYAN}{Style.BRIGHT}📈 Estatísticas:{Style.RESET_ALL}")
+        print(f"{Fore.WHITE}{'─' * 35}{Style.RESET_ALL}")
+        if 'mean' in summary:
+            print(f"  {Fore.WHITE}Média: {Fore.YELLOW}{summary['mean']:.1f}{Style.RESET_ALL}")
+        print(f"  {Fore.WHITE}Mínimo: {Fore.GREEN}{summary['min']}{Style.RESET_ALL}")
+        print(f"  {Fore.WHITE}Máximo: {Fore.RED}{summary['max']}{Style.RESET_ALL}")
+        if 'spread' in summary:
+            print(f"  {Fore.WHITE}Amplitude: {Fore.MAGENTA}{summary['spread']:g}{Style.RESET_ALL}")
         
         # Análise de consenso
         print(f"\n{Fore.CYAN}{Style.BRIGHT}🎯 Análise de Consenso:{Style.RESET_ALL}")
-        
-        if len(set(numeric_votes)) == 1:
-            print(f"  {Fore.GREEN}{Style.BRIGHT}✓ Consenso TOTAL! Todos votaram igual!{Style.RESET_ALL}")
-        elif max_vote - min_vote <= 1:
-            print(f"  {Fore.GREEN}✓ Consenso muito próximo!{Style.RESET_ALL}")
-        elif max_vote - min_vote <= 3:
-            print(f"  {Fore.YELLOW}~ Consenso razoável.{Style.RESET_ALL}")
-        elif max_vote - min_vote <= 8:
-            print(f"  {Fore.YELLOW}⚠ Divergência moderada - considere discutir.{Style.RESET_ALL}")
-        else:
-            print(f"  {Fore.RED}⚠ Grande divergência! Recomenda-se mais discussão.{Style.RESET_ALL}")
+        print(f"  {CONSENSUS_TEXT[summary['consensus']]}{Style.RESET_ALL}")
     
     # Contagem de votos especiais
-    special_votes = [v for v in votes if v in ['?', '☕']]
-    if special_votes:
-        print(f"\n{Fore.MAGENTA}Votos especiais: {len(special_votes)}{Style.RESET_ALL}")
-        if '?' in special_votes:
-            print(f"  {Fore.MAGENTA}? = Incerteza/Necessita esclarecimento{Style.RESET_ALL}")
-        if '☕' in special_votes:
-            print(f"  {Fore.CYAN}☕ = Pausa para café necessária!{Style.RESET_ALL}")
+    special = {vote: count for vote, count in counts if vote in SPECIAL_MEANINGS}
+    if special:
+        print(f"\n{Fore.MAGENTA}Votos especiais: {sum(special.values())}{Style.RESET_ALL}")
+        for vote in special:
+            print(f"  {card_color(vote, deck)}{SPECIAL_MEANINGS[vote]}{Style.RESET_ALL}")
 
 def print_welcome():
     """Tela de boas-vindas animada"""
@@ -0,0 +1,192 @@
+"""
+Journal das salas: log append-only com fsync em lote e snapshots
+
+Cada mutação de sala vira uma linha JSON [seq, sala, operação, args...].
+O caminho quente só serializa e enfileira; o fsync sai em lote por uma
+thread de fundo, então uma queda perde no máximo FSYNC_INTERVAL de
+operações. Snapshots periódicos limitam o log a ser reaplicado na partida.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Intervalo máximo (segundos) entre um append e o fsync que o torna durável
+FSYNC_INTERVAL = 0.05
+
+SNAPSHOT_FILE = 'snapshot.json'
+SEGMENT_PATTERN = 'journal-{:06d}.log'
+
+# Encoder reaproveitado: json.dumps com opções monta um encoder novo a cada chamada
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+class Journal:
+    """Log append-only em linhas JSON, com fsync em lote e snapshots
+
+    append() só serializa e enfileira; uma thread grava os lotes e faz um
+    fsync por lote a cada FSYNC_INTERVAL. O log é dividido em segmentos:
+    rotate() fecha o segmento atual, e um snapshot gravado depois da
+    rotação torna os segmentos anteriores descartáveis.
+    """
+
+    def __init__(self, directory, fsync_interval: float = FSYNC_INTERVAL):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()       # seq e buffer (caminho quente)
+        self._io_lock = threading.Lock()    # arquivo do segmento
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: List[str] = []
+        self._seq = 0
+        # Depois de um snapshot sem escritas novas, o segmento que ele aponta
+        # ainda não existe no disco: a numeração não pode recomeçar abaixo dele
+        snapshot = self._read_snapshot()
+        first = snapshot['segment'] if snapshot else 1
+        self._segment = max(max(self.segments(), default=0) + 1, first)
+        self._file = None
+        self._writer = None
+        self._running = True
+
+    def segments(self) -> List[int]:
+        """Números dos segmentos existentes, em ordem"""
+        numbers = []
+        for path in self.directory.glob('journal-*.log'):
+            try:
+                numbers.append(int(path.stem.split('-')[1]))
+            except (IndexError, ValueError):
+                continue
+        return sorted(numbers)
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / SEGMENT_PATTERN.format(number)
+
+    def _read_snapshot(self) -> Optional[dict]:
+        """Conteúdo do snapshot.json (None se ainda não houver)"""
+        snapshot_path = self.directory / SNAPSHOT_FILE
+        if not snapshot_path.exists():
+            return None
+        with open(snapshot_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self) -> Tuple[Optional[dict], Iterator[list]]:
+        """Snapshot mais recente e as entradas [seq, ...] gravadas depois dele
+
+        Também posiciona a sequência após a maior já gravada. Linhas
+        truncadas (queda no meio de uma escrita) são ignoradas.
+        """
+        snapshot = self._read_snapshot()
+        if snapshot:
+            self._seq = snapshot.get('seq', 0)
+        first = snapshot['segment'] if snapshot else 0
+
+        def entries():
+            for number in self.segments():
+                if number < first:
+                    continue
+                with open(self._segment_path(number), encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        self._seq = max(self._seq, entry[0])
+                        yield entry
+
+        return snapshot, entries()
+
+    def append(self, *fields) -> int:
+        """Acrescenta uma entrada [seq, *fields]; devolve o seq (durável em até fsync_interval)
+
+        Depois de close() as entradas são descartadas: as saídas provocadas
+        pelo próprio encerramento não devem esvaziar as salas no log.
+        """
+        with self._lock:
+            if not self._running:
+                return self._seq
+            self._seq += 1
+            seq = self._seq
+            self._pending.append(_encode([seq, *fields]))
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='journal', daemon=True)
+                self._writer.start()
+        return seq
+
+    @property
+    def seq(self) -> int:
+        """Último seq atribuído"""
+        return self._seq
+
+    def _write_loop(self):
+        """Grava os lotes pendentes e faz um fsync por lote"""
+        while True:
+            with self._lock:
+                if self._running:
+                    self._wakeup.wait(self.fsync_interval)
+                running = self._running
+            self.flush()
+            if not running:
+                return
+
+    def flush(self):
+        """Grava e sincroniza o que está pendente"""
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            if self._file is None:
+                self._file = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+            self._file.write('\n'.join(batch) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> int:
+        """Fecha o segmento atual; devolve o número do novo segmento"""
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if batch:
+                if self._file is None:
+                    self._file = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+                self._file.write('\n'.join(batch) + '\n')
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+            self._segment += 1
+            return self._segment
+
+    def write_snapshot(self, data: dict, segment: int):
+        """Grava o snapshot atomicamente e apaga os segmentos que ele cobre
+
+        `segment` é o primeiro segmento não coberto (o devolvido por rotate()
+        antes de capturar o estado).
+        """
+        data = dict(data, segment=segment, seq=self._seq)
+        tmp = self.directory / (SNAPSHOT_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.directory / SNAPSHOT_FILE)
+        for number in self.segments():
+            if number < segment:
+                self._segment_path(number).unlink()
+
+    def close(self):
+        """Grava o pendente e encerra a thread de escrita"""
+        with self._lock:
+            self._running = False
+            self._wakeup.notify()
+            writer = self._writer
+        if writer is not None:
+            writer.join()
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
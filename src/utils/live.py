@@ -0,0 +1,88 @@
+"""
+Entrada do modo ao vivo da sala
+
+Espera ao mesmo tempo por uma tecla no stdin e por um aviso da thread de
+recepção (chegou um ROOM_STATUS), com `selectors` e um pipe de despertar,
+sem prender o laço da tela num input() bloqueante.
+"""
+
+import os
+import selectors
+import sys
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import termios
+    import tty
+except ImportError:  # Windows: select() não aceita o console, usa o menu com input()
+    termios = None
+
+
+class LiveInput:
+    """Multiplexa o teclado e os avisos de atualização da sala"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self.stream, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._canonical = None  # Atributos do terminal antes de keys()
+
+    @staticmethod
+    def supported(stream=None) -> bool:
+        """O terminal permite o modo ao vivo (POSIX com stdin interativo)"""
+        stream = stream or sys.stdin
+        return termios is not None and stream.isatty()
+
+    def notify(self):
+        """Acorda quem está em wait() (chamado de outras threads)"""
+        try:
+            os.write(self._wake_w, b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Pipe cheio ou fechado: já há um aviso pendente
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Tecla pressionada, ou None se acordou por aviso ou pelo timeout"""
+        key = None
+        for selected, _ in self._selector.select(timeout):
+            if selected.fileobj is self._wake_r:
+                try:
+                    while os.read(self._wake_r, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+            else:
+                key = os.read(self.stream.fileno(), 1).decode('utf-8', 'ignore') or None
+        return key
+
+    @contextmanager
+    def keys(self):
+        """Modo cbreak: cada tecla chega na hora, sem eco e sem esperar o Enter"""
+        fd = self.stream.fileno()
+        self._canonical = termios.tcgetattr(fd)
+        try:
+            tty.setcbreak(fd)
+            yield self
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, self._canonical)
+
+    @contextmanager
+    def line_mode(self):
+        """Volta ao modo de linha dentro de keys() (para os prompts com input())"""
+        fd = self.stream.fileno()
+        cbreak = termios.tcgetattr(fd)
+        termios.tcsetattr(fd, termios.TCSADRAIN, self._canonical)
+        try:
+            yield
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, cbreak)
+
+    def close(self):
+        """Libera o seletor e o pipe"""
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
@@ -0,0 +1,112 @@
+"""
+Log estruturado e assíncrono do servidor
+
+Os handlers só enfileiram eventos (nome + campos como sala, jogador,
+tipo de mensagem e duração); uma thread de fundo os formata como linhas
+JSON e escreve no stdout ou em um arquivo rotativo. Sem setup(), só
+avisos e erros aparecem (no stderr), como em qualquer logger do Python.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+
+logger = logging.getLogger('planning_poker')
+
+# Rotação do arquivo de log
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname.lower(),
+            'event': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _EventListener(logging.handlers.QueueListener):
+    """Thread de escrita: só aqui os eventos viram LogRecords e são formatados"""
+
+    def prepare(self, item) -> logging.LogRecord:
+        created, level, event, exc_info, fields = item
+        record = logger.makeRecord(logger.name, level, '', 0, event, (), exc_info, extra={'fields': fields})
+        record.created = created
+        return record
+
+
+# Estado do log assíncrono (definido por setup)
+_records = None
+_level = logging.WARNING
+_sample = 1.0
+
+
+def setup(level: str = 'INFO', sample: float = 1.0, path: str = None) -> logging.handlers.QueueListener:
+    """Liga o log assíncrono; devolve o listener, a ser parado no encerramento
+
+    `sample` é a fração dos eventos abaixo de WARNING que é mantida.
+    """
+    global _records, _level, _sample
+    if path:
+        target = logging.handlers.RotatingFileHandler(
+            path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8')
+    else:
+        target = logging.StreamHandler(sys.stdout)
+    target.setFormatter(JsonFormatter())
+
+    numeric_level = logging.getLevelName(level.upper())
+    if not isinstance(numeric_level, int):
+        raise ValueError(f"nível de log desconhecido: {level}")
+    records = queue.SimpleQueue()
+    listener = _EventListener(records, target)
+    listener.start()
+    _records, _level, _sample = records, numeric_level, sample
+    return listener
+
+
+def log(level: int, event: str, exc_info=None, **fields):
+    """Registra um evento com campos estruturados
+
+    No caminho quente só há a checagem de nível, a amostragem e um put()
+    na fila; criar o LogRecord e formatar ficam com a thread de escrita.
+    """
+    if level < _level:
+        return
+    if level < logging.WARNING and _sample < 1 and random.random() >= _sample:
+        return
+    if isinstance(exc_info, BaseException):
+        exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
+    if _records is not None:
+        _records.put((time.time(), level, event, exc_info, fields))
+    else:
+        # Sem setup(): logging padrão do Python (avisos e erros no stderr)
+        logger.handle(logger.makeRecord(logger.name, level, '', 0, event, (), exc_info,
+                                        extra={'fields': fields}))
+
+
+def debug(event: str, **fields):
+    log(logging.DEBUG, event, **fields)
+
+
+def info(event: str, **fields):
+    log(logging.INFO, event, **fields)
+
+
+def warning(event: str, **fields):
+    log(logging.WARNING, event, **fields)
+
+
+def error(event: str, exc_info=None, **fields):
+    log(logging.ERROR, event, exc_info, **fields)
@@ -0,0 +1,223 @@
+"""
+Métricas do servidor no formato de exposição do Prometheus
+
+Os contadores são atualizados no caminho quente sem trava: cada thread
+escreve só no seu próprio dicionário, e a leitura (scrape) soma os
+dicionários de todas as threads. Valores instantâneos (salas, conexões)
+vêm de funções avaliadas na hora do scrape.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer  # Importado de fato só em serve()
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Threads mortas acumuladas antes de seus valores serem consolidados
+RETIRE_THRESHOLD = 64
+
+
+class _Shards:
+    """Um dicionário de valores por thread, somados na leitura"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()       # Só para registrar threads e consolidar
+        self._live: List[Tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+
+    def values(self) -> dict:
+        """Dicionário da thread atual"""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._live.append((threading.current_thread(), values))
+                if len(self._live) > RETIRE_THRESHOLD + threading.active_count():
+                    self._retire()
+            return values
+
+    def _retire(self):
+        """Consolida os valores de threads encerradas (trava presa)"""
+        live = []
+        for thread, values in self._live:
+            if thread.is_alive():
+                live.append((thread, values))
+            else:
+                _merge(self._retired, values)
+        self._live = live
+
+    def snapshot(self) -> dict:
+        """Soma dos valores de todas as threads"""
+        with self._lock:
+            self._retire()
+            total = {}
+            _merge(total, self._retired)
+            for _, values in self._live:
+                _merge(total, dict(values))  # Cópia atômica; a thread dona segue escrevendo
+        return total
+
+
+def _merge(into: dict, values: dict):
+    """Soma valores (números ou listas de baldes) em `into`"""
+    for key, value in values.items():
+        current = into.get(key)
+        if current is None:
+            into[key] = list(value) if isinstance(value, list) else value
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                current[i] += item
+        else:
+            into[key] = current + value
+
+
+_shards = _Shards()
+_metrics = []
+
+
+class Counter:
+    """Contador monotônico, opcionalmente com um rótulo"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        _metrics.append(self)
+
+    def inc(self, amount=1, label_value: Optional[str] = None):
+        """Soma `amount` (sem trava)"""
+        values = _shards.values()
+        key = (self.name, label_value)
+        values[key] = values.get(key, 0) + amount
+
+    def render(self, totals: dict) -> List[str]:
+        """Linhas de exposição"""
+        lines = []
+        for (name, label_value), value in sorted(totals.items(), key=_sort_key):
+            if name == self.name:
+                lines.append(f"{self.name}{_labels(self.label, label_value)} {value}")
+        return lines or ([f"{self.name} 0"] if self.label is None else [])
+
+
+class Histogram:
+    """Histograma com baldes fixos, opcionalmente com um rótulo"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets, label: Optional[str] = None):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        _metrics.append(self)
+
+    def observe(self, value: float, label_value: Optional[str] = None):
+        """Registra uma observação (sem trava)"""
+        values = _shards.values()
+        key = (self.name, label_value)
+        cell = values.get(key)
+        if cell is None:
+            # Contagem por balde (o último é +Inf) seguida da soma
+            cell = values[key] = [0] * (len(self.buckets) + 1) + [0]
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def render(self, totals: dict) -> List[str]:
+        """Linhas de exposição"""
+        lines = []
+        for (name, label_value), cell in sorted(totals.items(), key=_sort_key):
+            if name != self.name:
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), cell):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f"{self.name}_bucket{_labels(self.label, label_value, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label, label_value)} {cell[-1]:g}")
+            lines.append(f"{self.name}_count{_labels(self.label, label_value)} {cumulative}")
+        return lines
+
+
+def _sort_key(item):
+    (name, label_value), _ = item
+    return name, label_value or ''
+
+
+def _labels(label: Optional[str], value: Optional[str], le: Optional[str] = None) -> str:
+    """Bloco {rótulo="valor"} da linha de exposição"""
+    parts = []
+    if label is not None:
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{label}="{escaped}"')
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def render(gauges: Dict[str, Tuple[str, Callable[[], float]]] = None) -> str:
+    """Todas as métricas no formato texto do Prometheus"""
+    totals = _shards.snapshot()
+    lines = []
+    for name, (help_text, read) in (gauges or {}).items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {read()}"]
+    for metric in _metrics:
+        lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.kind}"]
+        lines += metric.render(totals)
+    return '\n'.join(lines) + '\n'
+
+
+def total(metric) -> float:
+    """Soma de um contador em todos os rótulos"""
+    return sum(value for (name, _), value in _shards.snapshot().items() if name == metric.name)
+
+
+def serve(host: str, port: int, gauges: Dict[str, Tuple[str, Callable[[], float]]] = None) -> 'ThreadingHTTPServer':
+    """Expõe GET /metrics em uma thread própria; devolve o servidor HTTP"""
+    # Importado só aqui: o cliente também carrega este módulo (via network)
+    # e http.server é a maior parte do seu tempo de inicialização
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render(gauges).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes não poluem o console
+
+    httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, name='metrics', daemon=True)
+    thread.start()
+    return httpd
+
+
+# Métricas do servidor
+MESSAGES_IN = Counter('planning_poker_messages_in_total', 'Mensagens recebidas dos clientes', 'type')
+MESSAGES_OUT = Counter('planning_poker_messages_out_total', 'Mensagens enfileiradas para clientes', 'type')
+BYTES_SENT = Counter('planning_poker_bytes_sent_total', 'Bytes escritos nos sockets dos clientes')
+SLOW_CLIENTS = Counter('planning_poker_slow_client_disconnects_total',
+                       'Conexões encerradas por estourar a fila de saída')
+BROADCAST_FANOUT = Histogram('planning_poker_broadcast_fanout', 'Destinatários por broadcast de sala',
+                             (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+HANDLER_SECONDS = Histogram('planning_poker_handler_seconds', 'Tempo de execução dos handlers',
+                            (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+                            'type')
+REAPED_CONNECTIONS = Counter('planning_poker_reaped_connections_total',
+                             'Conexões encerradas por ficarem em silêncio além do limite')
+OUTBOUND_QUEUE_BYTES = Histogram('planning_poker_outbound_queue_bytes',
+                                 'Bytes pendentes na fila de saída após cada envio',
+                                 (0, 1024, 4096, 16384, 65536, 131072, 262144))
@@ -1,10 +1,19 @@
 import json
-import socket
+import struct
+from typing import List
+
+from src.utils import metrics
 
 # Configurações de rede
 DEFAULT_HOST = '0.0.0.0'  # Escuta em todas as interfaces
 DEFAULT_PORT = 5555
 BUFFER_SIZE = 4096
+LISTEN_BACKLOG = 1024  # Fila de conexões pendentes (picos de entrada em massa)
+
+# Enquadramento: cada mensagem é precedida pelo seu tamanho (4 bytes, big-endian)
+FRAME_HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 1024 * 1024  # Limite por mensagem; protege a memória do servidor
+OUTBOUND_HIGH_WATER = 256 * 1024  # Bytes pendentes por conexão antes de desconectar um cliente lento
 
 # Tipos de mensagem
 MSG_TYPES = {
@@ -16,35 +25,142 @@ MSG_TYPES = {
     'REVEAL_VOTES': 'reveal_votes',
     'RESET_ROUND': 'reset_round',
     'ROOM_STATUS': 'room_status',
+    'ROOM_DELTA': 'room_delta',
+    'GET_ROOM_STATUS': 'get_room_status',
     'ERROR': 'error',
-    'SUCCESS': 'success'
+    'SUCCESS': 'success',
+    'HELLO': 'hello',
+    'REDIRECT': 'redirect',
+    'RESUME': 'resume',
+    'PING': 'ping',
+    'PONG': 'pong',
+    'LOAD_BACKLOG': 'load_backlog',
+    'NEXT_STORY': 'next_story'
 }
 
-def create_message(msg_type, data=None):
-    """Cria uma mensagem padronizada para envio"""
-    return json.dumps({
+def create_message(msg_type, data=None, request_id=None):
+    """Cria uma mensagem padronizada para envio
+
+    `request_id` vai no campo 'id' do envelope: o cliente numera suas
+    requisições e o servidor devolve o mesmo id na resposta.
+    """
+    message = {
         'type': msg_type,
         'data': data or {}
-    })
+    }
+    if request_id is not None:
+        message['id'] = request_id
+    return json.dumps(message)
+
+def encode_frame(payload: bytes) -> bytes:
+    """Prefixa o payload com o seu tamanho"""
+    if len(payload) > MAX_FRAME_SIZE:
+        raise FrameTooLarge(f"Mensagem de {len(payload)} bytes excede o limite de {MAX_FRAME_SIZE}")
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def encode_message(msg_type, data=None, codec=None, request_id=None) -> bytes:
+    """Cria a mensagem já enquadrada, pronta para o socket (JSON se codec for None)"""
+    if codec is not None:
+        return encode_frame(codec.encode(msg_type, data, request_id))
+    return encode_frame(create_message(msg_type, data, request_id).encode('utf-8'))
 
-def parse_message(message_str):
-    """Faz parse de uma mensagem recebida"""
+def parse_message(message):
+    """Faz parse de uma mensagem recebida (str, bytes ou memoryview)"""
     try:
-        return json.loads(message_str)
-    except json.JSONDecodeError:
+        if not isinstance(message, str):
+            message = str(message, 'utf-8')
+        return json.loads(message)
+    except (json.JSONDecodeError, UnicodeDecodeError):
         return None
 
-def send_message(sock, msg_type, data=None):
-    """Envia uma mensagem através do socket"""
-    message = create_message(msg_type, data)
-    sock.send(message.encode('utf-8'))
+def send_message(sock, msg_type, data=None, request_id=None):
+    """Envia uma mensagem através do socket, no codec negociado pela conexão"""
+    sock.sendall(encode_message(msg_type, data, getattr(sock, 'codec', None), request_id))
+    metrics.MESSAGES_OUT.inc(1, msg_type)
+
+def recv_exactly(sock, size):
+    """Lê exatamente `size` bytes do socket (None se a conexão fechar)"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            return None
+        received += count
+    return buffer
 
 def receive_message(sock):
     """Recebe e faz parse de uma mensagem do socket"""
     try:
-        data = sock.recv(BUFFER_SIZE).decode('utf-8')
-        if not data:
+        header = recv_exactly(sock, FRAME_HEADER.size)
+        if header is None:
+            return None
+        (size,) = FRAME_HEADER.unpack(header)
+        if size > MAX_FRAME_SIZE:
             return None
-        return parse_message(data)
-    except:
-        return None
\ No newline at end of file
+        payload = recv_exactly(sock, size)
+        if payload is None:
+            return None
+        return parse_message(payload)
+    except OSError:
+        return None
+
+
+class FrameTooLarge(ValueError):
+    """Quadro anunciado maior que MAX_FRAME_SIZE"""
+
+
+class FrameDecoder:
+    """Decodificador incremental de quadros, um por conexão
+
+    Recebe os bytes na ordem em que chegam do socket e devolve todos os
+    quadros completos como memoryviews, sem copiar os bytes já recebidos.
+    Só um quadro partido entre leituras é concatenado, uma única vez,
+    quando termina de chegar.
+    """
+
+    def __init__(self, max_frame_size: int = MAX_FRAME_SIZE):
+        self.max_frame_size = max_frame_size
+        self._chunks = []     # Pedaços de um quadro incompleto
+        self._pending = 0     # Bytes acumulados em _chunks
+        self._needed = 0      # Bytes necessários para avançar o parse
+
+    def feed(self, data) -> List[memoryview]:
+        """Consome bytes recebidos e devolve os quadros completos"""
+        if self._chunks:
+            self._chunks.append(data)
+            self._pending += len(data)
+            if self._pending < self._needed:
+                return []
+            data = b''.join(self._chunks)
+            self._chunks = []
+            self._pending = 0
+
+        view = memoryview(data)
+        frames = []
+        offset = 0
+        end = len(view)
+        header_size = FRAME_HEADER.size
+        while end - offset >= header_size:
+            (size,) = FRAME_HEADER.unpack_from(view, offset)
+            if size > self.max_frame_size:
+                raise FrameTooLarge(f"Quadro de {size} bytes excede o limite de {self.max_frame_size}")
+            start = offset + header_size
+            if end - start < size:
+                self._needed = header_size + size
+                break
+            frames.append(view[start:start + size])
+            offset = start + size
+        else:
+            self._needed = header_size
+
+        if offset < end:
+            self._chunks.append(view[offset:])
+            self._pending = end - offset
+        return frames
+
+    @property
+    def buffered(self) -> int:
+        """Bytes de um quadro incompleto mantidos em memória"""
+        return self._pending
@@ -0,0 +1,85 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable
+
+
+class TimerHandle:
+    """Referência a uma chamada agendada"""
+
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, deadline: float, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Cancela a chamada (se ainda não executou)"""
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """Agenda chamadas futuras em uma única thread, com um heap de prazos
+
+    Substitui um sleep por thread: agendar e cancelar custam O(log n), e a
+    thread só acorda no próximo prazo. Os callbacks devem ser rápidos
+    (tipicamente só entregam trabalho à caixa de correio de uma sala).
+    """
+
+    def __init__(self, on_error: Callable[[Exception], None] = None):
+        self._on_error = on_error
+        self._heap = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = True
+
+    def call_later(self, delay: float, callback: Callable, *args) -> TimerHandle:
+        """Executa callback(*args) depois de `delay` segundos"""
+        handle = TimerHandle(time.monotonic() + delay, callback, args)
+        with self._cond:
+            heapq.heappush(self._heap, (handle.deadline, next(self._sequence), handle))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='timers', daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is handle:
+                # Novo prazo mais próximo: acorda a thread para recalcular a espera
+                self._cond.notify()
+        return handle
+
+    def _run(self):
+        """Laço da thread de timers"""
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if not self._running:
+                    return
+                handle = heapq.heappop(self._heap)[2]
+            if handle.cancelled:
+                continue
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                if self._on_error:
+                    self._on_error(e)
+
+    def stop(self):
+        """Encerra a thread e descarta o que estava agendado"""
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._cond.notify()
+
+    def __len__(self):
+        """Chamadas agendadas (incluindo canceladas ainda no heap)"""
+        return len(self._heap)
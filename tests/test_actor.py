@@ -0,0 +1,28 @@
+import unittest
+
+from src.utils.actor import SerialExecutor
+
+
+class SerialExecutorTest(unittest.TestCase):
+    """Agendamento da caixa de correio no executor compartilhado"""
+
+    def test_refused_spawn_does_not_wedge_mailbox(self):
+        accept = False
+        done = []
+
+        def spawn(task):
+            if not accept:
+                return False
+            task()
+            return True
+
+        mailbox = SerialExecutor(spawn)
+        mailbox.submit(done.append, 'recusada')
+        accept = True
+        mailbox.submit(done.append, 'aceita')
+        self.assertEqual(done, ['recusada', 'aceita'])
+        self.assertEqual(len(mailbox), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+
+from src.utils.journal import Journal
+
+
+class JournalRestartTest(unittest.TestCase):
+    """Numeração dos segmentos entre reinícios"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def replay(self):
+        """Snapshot e entradas de um journal reaberto"""
+        journal = Journal(self.directory)
+        snapshot, entries = journal.load()
+        entries = list(entries)
+        journal.close()
+        return snapshot, entries
+
+    def test_entry_after_idle_snapshot_survives_restarts(self):
+        journal = Journal(self.directory)
+        journal.append('ABC', 'join', 'ana')
+        journal.write_snapshot({'rooms': []}, journal.rotate())
+        # Snapshot sem escritas pendentes: o segmento novo não chega a existir
+        journal.write_snapshot({'rooms': []}, journal.rotate())
+        journal.close()
+
+        journal = Journal(self.directory)
+        journal.load()
+        seq = journal.append('ABC', 'vote', 'ana', '5')
+        journal.close()
+
+        snapshot, entries = self.replay()
+        self.assertEqual(snapshot['seq'], 1)
+        self.assertEqual(entries, [[seq, 'ABC', 'vote', 'ana', '5']])
+        # Reabrir de novo não perde nem duplica a entrada
+        self.assertEqual(self.replay()[1], [[seq, 'ABC', 'vote', 'ana', '5']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from src.models.deck import get_deck
+from src.models.player import Player
+from src.models.room import Room
+
+
+def reveal(votes, deck=None):
+    """Resumo de uma rodada revelada com um voto por jogador"""
+    host = Player('p0', 'host')
+    room = Room('ABC', host, deck=get_deck(deck))
+    room.start_voting()
+    for i, vote in enumerate(votes):
+        player = host if i == 0 else Player(f'p{i}', f'player{i}')
+        room.add_player(player)
+        room.submit_vote(player.id, vote)
+    room.reveal_votes()
+    return room.summarize()
+
+
+class ConsensusTest(unittest.TestCase):
+    """Nível de consenso do resumo da revelação"""
+
+    def test_fibonacci_uses_point_spread(self):
+        verdicts = {
+            ('5', '5'): 'total',
+            ('1', '2'): 'close',
+            ('3', '5'): 'fair',
+            ('5', '8'): 'fair',
+            ('8', '13'): 'moderate',
+            ('5', '13'): 'moderate',
+            ('13', '21'): 'moderate',
+            ('8', '21'): 'wide',
+        }
+        for votes, consensus in verdicts.items():
+            with self.subTest(votes=votes):
+                self.assertEqual(reveal(votes)['consensus'], consensus)
+
+    def test_special_cards_do_not_count(self):
+        summary = reveal(['3', '5', '?', '☕'])
+        self.assertEqual((summary['min'], summary['max'], summary['spread']), ('3', '5', 2))
+        self.assertEqual(summary['consensus'], 'fair')
+
+    def test_tshirt_uses_scale_steps(self):
+        self.assertEqual(reveal(['M', 'M'], 'tshirt')['consensus'], 'total')
+        self.assertEqual(reveal(['S', 'M'], 'tshirt')['consensus'], 'close')
+        self.assertEqual(reveal(['XS', 'XXL'], 'tshirt')['consensus'], 'wide')
+        self.assertNotIn('spread', reveal(['S', 'L'], 'tshirt'))
+
+
+
+class SubmitVoteTest(unittest.TestCase):
+    """Validação do voto recebido do cliente"""
+
+    def test_rejects_non_string_votes(self):
+        host = Player('p0', 'host')
+        room = Room('ABC', host, deck=get_deck('fibonacci'))
+        room.start_voting()
+        for vote in (['5'], {'card': '5'}, 5, None):
+            with self.subTest(vote=vote):
+                self.assertFalse(room.submit_vote(host.id, vote))
+        self.assertTrue(room.submit_vote(host.id, '5'))
+
+
+
+class RevealedSummaryTest(unittest.TestCase):
+    """Resumo da rodada quando um votante sai depois da revelação"""
+
+    def test_leaving_voter_is_removed_from_summary(self):
+        host, guest = Player('p0', 'host'), Player('p1', 'guest')
+        room = Room('ABC', host)
+        room.add_player(guest)
+        room.start_voting()
+        room.submit_vote(host.id, '3')
+        room.submit_vote(guest.id, '13')
+        room.reveal_votes()
+        room.take_events()
+        status = room.get_status()
+
+        room.remove_player(guest.id)
+        self.assertEqual(room.summary, room.summarize())
+        self.assertEqual((room.summary['total'], room.summary['consensus']), (1, 'total'))
+        # Quem segue por deltas recebe o mesmo resumo
+        _, events = room.take_events()
+        self.assertEqual(Room.apply_events(status, events)['summary'], room.summary)
+
+
+if __name__ == '__main__':
+    unittest.main()